@@ -0,0 +1,183 @@
+import json, hashlib
+from os import listdir, replace
+from os.path import basename, dirname, exists, join
+from typing import Iterable, Iterator, Mapping
+from vocabulary import iter_entries
+
+CACHE_VERSION = 1
+# 去掉詞綴後剩下的字根至少要有幾個字母，避免 -s、a- 之類把單字拆得太碎
+MIN_STEM = 3
+DEFAULT_ARCHIVE_DIR = "etymology_archive"
+
+
+def cache_path(vocabulary_file: str) -> str:
+    return join(dirname(vocabulary_file), f".{basename(vocabulary_file)}.affixes.json")
+
+
+def affix_kind(affix: str) -> str | None:
+    """ab- 為字首、-tion 為字尾，-i- 這類中綴與非詞綴回傳 None"""
+    if len(affix) < 2 or (affix[0] == "-") == (affix[-1] == "-"):
+        return None
+    return "prefix" if affix[-1] == "-" else "suffix"
+
+
+def archive_affixes(archive_dir: str) -> list[str]:
+    """辭源存檔中詞綴本身的頁面 (如 -able.md、ab-.md)"""
+    if not exists(archive_dir):
+        return []
+    names = (name[:-3] for name in listdir(archive_dir) if name.endswith(".md"))
+    return sorted(name for name in names if affix_kind(name) is not None)
+
+
+class TrieNode:
+    __slots__ = ("children", "affix")
+
+    def __init__(self) -> None:
+        self.children: dict[str, TrieNode] = {}
+        # 走到此節點為止是一個詞綴時為該詞綴，否則為 None
+        self.affix: str | None = None
+
+
+class AffixTrie:
+    """字典樹，match 沿著字串走一次即可找出所有為其開頭的詞綴"""
+
+    def __init__(self, keys: Iterable[tuple[str, str]] = ()) -> None:
+        self.root = TrieNode()
+        for key, affix in keys:
+            self.add(key, affix)
+
+    def add(self, key: str, affix: str) -> None:
+        node = self.root
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = TrieNode()
+            node = child
+        node.affix = affix
+
+    def match(self, chars: Iterable[str]) -> Iterator[tuple[int, str]]:
+        """依長度由短到長產生 (長度, 詞綴)"""
+        node = self.root
+        for depth, char in enumerate(chars, 1):
+            child = node.children.get(char)
+            if child is None:
+                return
+            node = child
+            if node.affix is not None:
+                yield depth, node.affix
+
+
+class AffixIndex:
+    """單字 ↔ 詞綴的雙向索引
+
+    詞綴來自 affix.txt 與辭源存檔中的詞綴頁面；字首放在一般字典樹，字尾以反轉的字串放在另一棵字典樹，
+    每個單字只需從頭、從尾各走一次就能找出所有候選詞綴。拆解結果以詞彙檔、詞綴檔與存檔詞綴的雜湊為鍵快取。
+    """
+
+    def __init__(self, meanings: dict[str, str], archived: Iterable[str], decompositions: dict[str, list[str]]) -> None:
+        # 詞綴 → affix.txt 中的意思 (只存在於存檔的詞綴為空字串)
+        self.meanings = meanings
+        self.archived = set(archived)
+        self.prefixes = AffixTrie((affix[:-1], affix) for affix in meanings if affix_kind(affix) == "prefix")
+        self.suffixes = AffixTrie((affix[:0:-1], affix) for affix in meanings if affix_kind(affix) == "suffix")
+        self.decompositions = decompositions
+        self.by_affix: dict[str, list[str]] = {affix: [] for affix in meanings}
+        for word, affixes in decompositions.items():
+            for affix in affixes:
+                self.by_affix.setdefault(affix, []).append(word)
+
+    @classmethod
+    def build(cls, vocabulary: Iterable[str], meanings: dict[str, str], archived: Iterable[str]) -> "AffixIndex":
+        index = cls(meanings, archived, {})
+        for word in vocabulary:
+            affixes = index.candidates(word)
+            if affixes:
+                index.decompositions[word] = affixes
+                for affix in affixes:
+                    index.by_affix[affix].append(word)
+        return index
+
+    @classmethod
+    def load(
+        cls, affix_file: str, vocabulary_file: str, vocabulary: Iterable[str], archive_dir: str = DEFAULT_ARCHIVE_DIR
+    ) -> "AffixIndex":
+        """讀取快取；任一來源改變或快取損壞時重新拆解並寫回"""
+        meanings = {affix: meaning for affix, meaning in iter_entries(affix_file) if affix_kind(affix) is not None}
+        archived = archive_affixes(archive_dir)
+        for affix in archived:
+            meanings.setdefault(affix, "")
+        digest = hashlib.sha256()
+        for file_path in (affix_file, vocabulary_file):
+            with open(file_path, "rb") as f:
+                digest.update(f.read())
+        digest.update("\n".join(archived).encode("utf-8"))
+        file_hash = digest.hexdigest()
+        path = cache_path(vocabulary_file)
+        if exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    cache = json.load(f)
+                if cache["version"] == CACHE_VERSION and cache["hash"] == file_hash:
+                    return cls(meanings, archived, cache["decompositions"])
+            except (OSError, ValueError, KeyError):
+                pass
+        index = cls.build(vocabulary, meanings, archived)
+        try:
+            index.save(path, file_hash)
+        except OSError:
+            pass
+        return index
+
+    def save(self, path: str, file_hash: str) -> None:
+        cache = {"version": CACHE_VERSION, "hash": file_hash, "decompositions": self.decompositions}
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False)
+        replace(tmp_path, path)
+
+    def split(self, word: str) -> tuple[list[tuple[int, str]], list[tuple[int, str]]]:
+        """單字開頭符合的字首與結尾符合的字尾 (長度, 詞綴)，片語與去掉後字根太短的不算"""
+        text = word.lower()
+        if " " in text:
+            return [], []
+        limit = len(text) - MIN_STEM
+        prefixes = [(n, affix) for n, affix in self.prefixes.match(text) if n <= limit]
+        suffixes = [(n, affix) for n, affix in self.suffixes.match(reversed(text)) if n <= limit]
+        return prefixes, suffixes
+
+    def candidates(self, word: str) -> list[str]:
+        prefixes, suffixes = self.split(word)
+        return [affix for _, affix in prefixes + suffixes]
+
+    def decompose(self, word: str) -> tuple[str | None, str, str | None]:
+        """(字首, 字根, 字尾)：在字根不短於 MIN_STEM 的前提下取詞綴總長最長的組合"""
+        prefixes, suffixes = self.split(word)
+        best: tuple[int, int, str | None, str | None] = (0, 0, None, None)
+        for p, prefix in [(0, None)] + prefixes:
+            for s, suffix in [(0, None)] + suffixes:
+                if p + s > best[0] + best[1] and p + s <= len(word) - MIN_STEM:
+                    best = (p, s, prefix, suffix)
+        p, s, prefix, suffix = best
+        return prefix, word[p : len(word) - s], suffix
+
+    def affixes_of(self, word: str) -> list[str]:
+        return self.decompositions.get(word, [])
+
+    def words_with(self, affix: str) -> list[str]:
+        return self.by_affix.get(affix, [])
+
+    def has_etymology(self, affix: str) -> bool:
+        return affix in self.archived
+
+    def accuracy(self, affix: str, log: Mapping[str, int]) -> tuple[int, int, int]:
+        """(單字數, 已測過的單字數, 淨答錯的單字數)；log 為 log.json 中答對減答錯的次數"""
+        words = self.words_with(affix)
+        tested = [log[word] for word in words if log.get(word)]
+        return len(words), len(tested), sum(1 for count in tested if count < 0)
+
+    def weakest(self, log: Mapping[str, int], limit: int = 10) -> list[tuple[str, int, int, int]]:
+        """依淨答錯單字的比例排序的詞綴 (詞綴, 單字數, 已測, 答錯)"""
+        stats = [(affix, *self.accuracy(affix, log)) for affix, words in self.by_affix.items() if words]
+        stats = [item for item in stats if item[2]]
+        stats.sort(key=lambda item: (-item[3] / item[2], -item[3], item[0]))
+        return stats[:limit]
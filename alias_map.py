@@ -0,0 +1,55 @@
+import json
+from os import replace
+from os.path import exists
+
+
+def normalize_alias(word: str) -> str:
+    return word.strip().lower()
+
+
+class AliasMap:
+    """變化形 (如 accessed) → etymonline 實際頁面 slug (如 access) 的持久對照表
+
+    只記錄搜尋確認過的對應；之後的執行直接改抓對應的頁面，不再對每個變化形各發一次單字頁與搜尋請求。
+    刪除檔案即可清除所有對應。
+    """
+
+    def __init__(self, file_path: str, save_every: int = 20) -> None:
+        self.file_path = file_path
+        self.save_every = save_every
+        self.aliases: dict[str, str] = {}
+        self.dirty = 0
+        if exists(file_path):
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    self.aliases = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"讀取別名表時發生錯誤，將重新建立：{e}")
+
+    def __len__(self) -> int:
+        return len(self.aliases)
+
+    def get(self, word: str) -> str | None:
+        return self.aliases.get(normalize_alias(word))
+
+    def resolve(self, word: str) -> str:
+        """有對應時回傳對應的 slug，否則回傳原單字"""
+        return self.get(word) or word
+
+    def add(self, word: str, canonical: str) -> None:
+        key = normalize_alias(word)
+        if key == canonical or self.aliases.get(key) == canonical:
+            return
+        self.aliases[key] = canonical
+        self.dirty += 1
+        if self.dirty >= self.save_every:
+            self.save()
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        tmp_path = self.file_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.aliases, f, ensure_ascii=False, indent=1, sort_keys=True)
+        replace(tmp_path, self.file_path)
+        self.dirty = 0
@@ -0,0 +1,185 @@
+import json, hashlib
+from os import replace
+from os.path import basename, dirname, exists, join
+from typing import Mapping
+
+CHINESE_PARTICLES = "的地得"
+CACHE_VERSION = 1
+# 模糊比對：相似度 >= FUZZY_ACCEPT 直接算對，< FUZZY_REJECT 直接算錯，其間交由人工確認
+FUZZY_ACCEPT = 0.8
+FUZZY_REJECT = 0.34
+NGRAM_SIZE = 2
+MAX_EDITS = 2
+
+
+def split_answer(answer: str) -> list[str]:
+    """將答案按多種分隔符分割（、空格、逗號等）"""
+    parts = [answer]
+    for sep in ("、", ",", " ", ", "):
+        parts = [j.strip() for i in parts for j in i.split(sep) if j.strip()]
+    return parts
+
+
+def normalize_answer(answer: str) -> str:
+    """標準化答案：移除中文助詞並轉換為小寫"""
+    answer = answer.lower().strip()
+    if answer and answer[-1] in CHINESE_PARTICLES:
+        answer = answer[:-1].strip()
+    return answer
+
+
+def parse_variants(correct_answer: str) -> frozenset[str]:
+    """解析正確答案的所有變體"""
+    variants: set[str] = set()
+    for variant in split_answer(correct_answer):
+        variant = variant.lower().strip()
+        # 處理同義詞標記 (=...)
+        if len(variant) >= 4 and variant[0] == "(" and variant[1] == "=" and variant[-1] == ")":
+            variant = variant[2:-1].strip()
+        variants.add(normalize_answer(variant))
+    return frozenset(variants)
+
+
+def char_ngrams(text: str, n: int = NGRAM_SIZE) -> frozenset[str]:
+    """前後補空白的字元 n-gram，讓單一字元的答案也有 n-gram"""
+    padded = f" {text} "
+    return frozenset(padded[i : i + n] for i in range(len(padded) - n + 1))
+
+
+def bounded_edit_distance(a: str, b: str, limit: int = MAX_EDITS) -> int:
+    """Levenshtein 距離，超過 limit 時提早結束並回傳 limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+
+def similarity(answer: str, variant: str, answer_grams: frozenset[str], variant_grams: frozenset[str]) -> float:
+    """n-gram 的 Jaccard 相似度；少量錯字時改以編輯距離計算，取兩者較高者"""
+    jaccard = len(answer_grams & variant_grams) / len(answer_grams | variant_grams)
+    distance = bounded_edit_distance(answer, variant)
+    if distance > MAX_EDITS:
+        return jaccard
+    return max(jaccard, 1 - distance / max(len(answer), len(variant)))
+
+
+def cache_path(vocabulary_file: str) -> str:
+    return join(dirname(vocabulary_file), f".{basename(vocabulary_file)}.answers.json")
+
+
+class AnswerIndex:
+    """單字 → 標準化答案變體集合，以及變體 → 單字的反向索引
+
+    以詞彙檔的雜湊為鍵快取於磁碟，詞彙檔未變動時啟動不需重新解析。
+    """
+
+    def __init__(self, variants: dict[str, frozenset[str]]) -> None:
+        self.variants = variants
+        # on_demand 建立時為詞彙本身，單字第一次被批改時才解析其變體
+        self.source: Mapping[str, str] | None = None
+        self.reverse: dict[str, set[str]] = {}
+        for word, word_variants in variants.items():
+            for variant in word_variants:
+                self.reverse.setdefault(variant, set()).add(word)
+        # 模糊比對才需要，第一次使用時建立
+        self.variant_grams: dict[str, frozenset[str]] = {}
+
+    @classmethod
+    def build(cls, vocabulary: Mapping[str, str]) -> "AnswerIndex":
+        return cls({word: parse_variants(answer) for word, answer in vocabulary.items()})
+
+    @classmethod
+    def load(cls, vocabulary_file: str, vocabulary: Mapping[str, str]) -> "AnswerIndex":
+        """讀取快取；詞彙檔雜湊不符或快取損壞時重新建立並寫回"""
+        with open(vocabulary_file, "rb") as f:
+            file_hash = hashlib.sha256(f.read()).hexdigest()
+        path = cache_path(vocabulary_file)
+        if exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    cache = json.load(f)
+                if cache["version"] == CACHE_VERSION and cache["hash"] == file_hash:
+                    return cls({word: frozenset(variants) for word, variants in cache["variants"].items()})
+            except (OSError, ValueError, KeyError):
+                pass
+        index = cls.build(vocabulary)
+        try:
+            index.save(path, file_hash)
+        except OSError:
+            pass
+        return index
+
+    @classmethod
+    def on_demand(cls, vocabulary: Mapping[str, str]) -> "AnswerIndex":
+        """不預先解析也不讀取快取 (詞彙以 VocabularyIndex 延遲載入時使用)；反向索引只包含已解析過的單字"""
+        index = cls({})
+        index.source = vocabulary
+        return index
+
+    def variants_of(self, word: str) -> frozenset[str]:
+        variants = self.variants.get(word)
+        if variants is None:
+            if self.source is None or word not in self.source:
+                return frozenset()
+            variants = self.variants[word] = parse_variants(self.source[word])
+            for variant in variants:
+                self.reverse.setdefault(variant, set()).add(word)
+                if self.variant_grams:
+                    self.variant_grams[variant] = char_ngrams(variant)
+        return variants
+
+    def save(self, path: str, file_hash: str) -> None:
+        cache = {"version": CACHE_VERSION, "hash": file_hash, "variants": {word: sorted(v) for word, v in self.variants.items()}}
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False)
+        replace(tmp_path, path)
+
+    def matches(self, word: str, user_answer: str) -> bool:
+        """用戶答案中任一部分為該單字的變體即視為正確"""
+        correct = self.variants_of(word)
+        return any(normalize_answer(part) in correct for part in split_answer(user_answer))
+
+    def words_for(self, answer: str) -> set[str]:
+        """回傳以此答案為意思之一的所有單字"""
+        words: set[str] = set()
+        for part in split_answer(answer):
+            words |= self.reverse.get(normalize_answer(part), set())
+        return words
+
+    def build_ngrams(self) -> None:
+        """預先計算所有標準化變體的字元 n-gram，第一次模糊比對時建立一次"""
+        if self.variant_grams:
+            return
+        for variant in self.reverse:
+            self.variant_grams[variant] = char_ngrams(variant)
+
+    def score(self, word: str, user_answer: str) -> float:
+        """用戶答案各部分與該單字各變體的最高相似度，完全相符為 1"""
+        correct = self.variants_of(word)
+        parts = [normalize_answer(part) for part in split_answer(user_answer)]
+        if any(part in correct for part in parts):
+            return 1.0
+        self.build_ngrams()
+        best = 0.0
+        for part in parts:
+            grams = char_ngrams(part)
+            for variant in correct:
+                best = max(best, similarity(part, variant, grams, self.variant_grams[variant]))
+        return best
+
+    def grade(self, word: str, user_answer: str) -> tuple[bool | None, float]:
+        """(結果, 相似度)：結果 True 為正確、False 為錯誤，None 表示落在需要人工確認的區間"""
+        score = self.score(word, user_answer)
+        if score >= FUZZY_ACCEPT:
+            return True, score
+        if score < FUZZY_REJECT:
+            return False, score
+        return None, score
@@ -0,0 +1,139 @@
+import asyncio, hashlib
+from concurrent.futures import Executor, ThreadPoolExecutor
+from os import O_RDONLY, close, fsync, open as os_open, replace, stat
+from os.path import abspath, dirname, exists
+from typing import Any, Callable, TypeVar
+
+WriteResult = tuple[bool, str]
+T = TypeVar("T")
+
+
+def content_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def is_unchanged(path: str, data: bytes, digest: str, known_hash: str | None = None) -> bool:
+    """大小或已知雜湊 (如抓取清單中的記錄) 不同時一定有變更，否則才讀取現有檔案比對"""
+    if known_hash is not None and known_hash != digest:
+        return False
+    if not exists(path) or stat(path).st_size != len(data):
+        return False
+    with open(path, "rb") as f:
+        return content_digest(f.read()) == digest
+
+
+def fsync_directory(directory: str) -> None:
+    """讓 rename 本身落地；Windows 無法開啟目錄，直接略過"""
+    try:
+        fd = os_open(directory, O_RDONLY)
+    except OSError:
+        return
+    try:
+        fsync(fd)
+    except OSError:
+        pass
+    finally:
+        close(fd)
+
+
+def write_batch(items: list[tuple[str, str, str | None]], durable: bool = True) -> list[WriteResult | Exception]:
+    """內容有變更的檔案先全部寫入暫存檔，整批 fsync 後再逐一 rename，最後每個目錄 fsync 一次"""
+    results: list[WriteResult | Exception] = []
+    renames: list[tuple[int, str, str]] = []
+    for index, (path, text, known_hash) in enumerate(items):
+        try:
+            data = text.encode("utf-8")
+            digest = content_digest(data)
+            if is_unchanged(path, data, digest, known_hash):
+                results.append((False, digest))
+                continue
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+                if durable:
+                    f.flush()
+                    fsync(f.fileno())
+            renames.append((index, tmp_path, path))
+            results.append((True, digest))
+        except Exception as e:
+            results.append(e)
+    directories: set[str] = set()
+    for index, tmp_path, path in renames:
+        try:
+            replace(tmp_path, path)
+            directories.add(dirname(abspath(path)))
+        except OSError as e:
+            results[index] = e
+    if durable:
+        for directory in directories:
+            fsync_directory(directory)
+    return results
+
+
+def write_file(path: str, text: str, known_hash: str | None = None, durable: bool = False) -> WriteResult:
+    """同步寫入單一檔案，回傳 (是否有寫入, 內容雜湊)"""
+    result = write_batch([(path, text, known_hash)], durable)[0]
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+class ArchiveWriter:
+    """在執行緒中批次寫檔的非同步寫入器
+
+    submit 在佇列已滿時等待 (背壓)，回傳的 Future 在檔案寫入 (或確認內容未變而略過) 後完成；
+    背景工作一次取出目前佇列中最多 batch_size 筆，交給 write_batch 在 executor 中處理。
+    """
+
+    def __init__(self, max_pending: int = 64, batch_size: int = 32, durable: bool = True, executor: Executor | None = None) -> None:
+        self.queue: asyncio.Queue[tuple[str, str, str | None, asyncio.Future[WriteResult]]] = asyncio.Queue(maxsize=max_pending)
+        self.batch_size = batch_size
+        self.durable = durable
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="archive-writer")
+        self.owns_executor = executor is None
+        self.task: asyncio.Task[None] | None = None
+        self.written = 0
+        self.skipped = 0
+
+    async def submit(self, path: str, text: str, known_hash: str | None = None) -> "asyncio.Future[WriteResult]":
+        if self.task is None:
+            self.task = asyncio.create_task(self._run())
+        future: asyncio.Future[WriteResult] = asyncio.get_running_loop().create_future()
+        await self.queue.put((path, text, known_hash, future))
+        return future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                results = await loop.run_in_executor(self.executor, write_batch, [item[:3] for item in batch], self.durable)
+            except Exception as e:
+                results = [e] * len(batch)
+            for (_, _, _, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    self.written += result[0]
+                    self.skipped += not result[0]
+                    future.set_result(result)
+            for _ in batch:
+                self.queue.task_done()
+
+    def call(self, fn: Callable[..., T], *args: Any) -> "asyncio.Future[T]":
+        """在寫檔的執行緒中執行其他同步工作 (如 SQLite 寫入)，與寫檔依序進行、不佔用事件迴圈"""
+        return asyncio.wrap_future(self.executor.submit(fn, *args))
+
+    async def close(self) -> None:
+        """等待已送出的寫入完成後結束背景工作"""
+        if self.task is not None:
+            await self.queue.join()
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        if self.owns_executor:
+            self.executor.shutdown(wait=True)
@@ -0,0 +1,290 @@
+"""詞彙檔、章節檔與 etymology_archive 的一致性檢查
+
+用法：python audit.py [--archive etymology_archive] [--output findings.jsonl] [--missing new.txt] [--workers N] [--no-cache]
+檔案的讀取與解析分批交給子行程，每筆發現以一行 JSON 輸出 (預設為標準輸出)，結尾的統計寫到標準錯誤。
+每個檔案的解析結果依 mtime 與大小快取在 .audit_cache.json，重複檢查時只重新讀取有變動的檔案。
+--missing 會把缺少辭源存檔的單字附加到指定清單 (如 new.txt，略過已在清單中的)，可直接交給 etymonline.py 重新抓取。
+
+檢查項目：
+    missing_archive    words.txt/affix.txt 的單字沒有對應的存檔 (別名表已對應到現有存檔的不算)
+    not_found          同上，但抓取清單記錄網站上找不到此單字
+    empty_archive      存檔沒有任何標題以外的內容
+    title_mismatch     存檔標題與檔名不符
+    orphan_archive     存檔不屬於任何詞彙、別名或搜尋結果
+    not_in_dictionary  章節中的單字不在合併後的 words.txt/affix.txt
+    missing_meaning    章節中的定義沒有合併進字典
+    not_in_chapters    字典中的單字不在任何章節
+    chapter_duplicate  去重後章節之間仍有重複的單字
+    unreadable         檔案無法讀取或不是 UTF-8
+"""
+
+import sys, json, argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from os import cpu_count, listdir, replace, stat
+from os.path import exists, join
+from typing import Any, Iterator, TextIO
+from remove_duplicates import AFFIX_FILE, WORDS_FILE, files as CHAPTER_FILES, is_affix
+from vocabulary import iter_entries, iter_listed_words, unique
+from etymonline import ALIAS_FILE, MANIFEST_FILE
+
+DEFAULT_ARCHIVE_DIR = "etymology_archive"
+AUDIT_CACHE_FILE = ".audit_cache.json"
+CACHE_VERSION = 1
+BATCH_SIZE = 256
+SEVERITY = {
+    "missing_archive": "error",
+    "not_found": "info",
+    "empty_archive": "error",
+    "title_mismatch": "warning",
+    "orphan_archive": "info",
+    "not_in_dictionary": "error",
+    "missing_meaning": "error",
+    "not_in_chapters": "warning",
+    "chapter_duplicate": "warning",
+    "unreadable": "error",
+}
+
+
+def read_archive_file(path: str) -> dict[str, Any]:
+    """存檔的標題與內容行數"""
+    title: str | None = None
+    content_lines = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if title is None and line.startswith("# "):
+                title = line[2:].strip()
+            elif line and not line.startswith("#") and line != "---":
+                content_lines += 1
+    return {"title": title, "content_lines": content_lines}
+
+
+def read_chapter_file(path: str) -> dict[str, Any]:
+    """章節中的 (種類, 單字, 定義, 行號)，解析方式與 remove_duplicates.scan_chapter 相同"""
+    entries: list[tuple[int, str, list[str], int]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for i, line in enumerate(f, 1):
+            t = line.split(":")
+            if len(t) == 2:
+                entries.append((1 if is_affix(t[0]) else 0, t[0].strip(), t[1].strip().split("、"), i))
+    return {"entries": entries}
+
+
+READERS = {"archive": read_archive_file, "chapter": read_chapter_file}
+
+
+def read_batch(kind: str, paths: list[str]) -> list[tuple[str, float, int, dict[str, Any] | None, str | None]]:
+    """在子行程中讀取一批檔案，回傳 (路徑, mtime, 大小, 結果, 錯誤)"""
+    results: list[tuple[str, float, int, dict[str, Any] | None, str | None]] = []
+    for path in paths:
+        try:
+            st = stat(path)
+            results.append((path, st.st_mtime, st.st_size, READERS[kind](path), None))
+        except (OSError, UnicodeDecodeError) as e:
+            results.append((path, 0.0, 0, None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+class AuditCache:
+    """路徑 → (mtime, 大小, 解析結果)"""
+
+    def __init__(self, file_path: str | None) -> None:
+        self.file_path = file_path
+        self.files: dict[str, dict[str, Any]] = {}
+        if file_path and exists(file_path):
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    cache = json.load(f)
+                if cache.get("version") == CACHE_VERSION:
+                    self.files = cache["files"]
+            except (OSError, ValueError, KeyError):
+                pass
+
+    def get(self, kind: str, path: str) -> dict[str, Any] | None:
+        record = self.files.get(path)
+        if record is None or record["kind"] != kind:
+            return None
+        try:
+            st = stat(path)
+        except OSError:
+            return None
+        return record["result"] if record["mtime"] == st.st_mtime and record["size"] == st.st_size else None
+
+    def put(self, kind: str, path: str, mtime: float, size: int, result: dict[str, Any]) -> None:
+        self.files[path] = {"kind": kind, "mtime": mtime, "size": size, "result": result}
+
+    def save(self, paths: set[str]) -> None:
+        """只保留這次檢查到的檔案"""
+        if not self.file_path:
+            return
+        tmp_path = self.file_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "files": {p: r for p, r in self.files.items() if p in paths}}, f, ensure_ascii=False)
+        replace(tmp_path, self.file_path)
+
+
+def finding(check: str, **fields: Any) -> dict[str, Any]:
+    return {"check": check, "severity": SEVERITY[check], **fields}
+
+
+def read_all(
+    jobs: list[tuple[str, str]], cache: AuditCache, workers: int
+) -> Iterator[tuple[str, str, dict[str, Any] | None, str | None]]:
+    """快取命中的直接產生，其餘分批交給子行程，依完成順序產生 (種類, 路徑, 結果, 錯誤)"""
+    stale: dict[str, list[str]] = {}
+    for kind, path in jobs:
+        result = cache.get(kind, path)
+        if result is not None:
+            yield kind, path, result, None
+        else:
+            stale.setdefault(kind, []).append(path)
+    if not stale:
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(read_batch, kind, paths[i : i + BATCH_SIZE]): kind
+            for kind, paths in stale.items()
+            for i in range(0, len(paths), BATCH_SIZE)
+        }
+        for future in as_completed(futures):
+            kind = futures[future]
+            for path, mtime, size, result, error in future.result():
+                if result is not None:
+                    cache.put(kind, path, mtime, size, result)
+                yield kind, path, result, error
+
+
+def load_json(path: str) -> dict[str, Any]:
+    if not exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def audit(
+    archive_dir: str = DEFAULT_ARCHIVE_DIR,
+    words_file: str = WORDS_FILE,
+    affix_file: str = AFFIX_FILE,
+    chapters: list[str] = CHAPTER_FILES,
+    cache_file: str | None = AUDIT_CACHE_FILE,
+    workers: int | None = None,
+) -> Iterator[dict[str, Any]]:
+    """依序產生所有發現；單一檔案的問題在讀取完成時立即產生，跨檔案的比對在最後產生"""
+    cache = AuditCache(cache_file)
+    dictionaries = [dict(iter_entries(words_file)), dict(iter_entries(affix_file))]
+    archive_words = {name[:-3] for name in listdir(archive_dir) if name.endswith(".md")} if exists(archive_dir) else set()
+    aliases: dict[str, str] = load_json(join(archive_dir, ALIAS_FILE))
+    manifest: dict[str, dict[str, Any]] = load_json(join(archive_dir, MANIFEST_FILE))
+
+    jobs = [("chapter", path) for path in chapters] + [("archive", join(archive_dir, f"{word}.md")) for word in sorted(archive_words)]
+    chapter_results: dict[str, dict[str, Any]] = {}
+    for kind, path, result, error in read_all(jobs, cache, workers or cpu_count() or 1):
+        if result is None:
+            yield finding("unreadable", file=path, detail=error)
+            continue
+        if kind == "chapter":
+            chapter_results[path] = result
+            continue
+        word = path[len(archive_dir) + 1 : -3]
+        if not result["content_lines"]:
+            yield finding("empty_archive", file=path, word=word)
+        if result["title"] is not None and result["title"].lower() != word.lower():
+            yield finding("title_mismatch", file=path, word=word, detail=result["title"])
+    cache.save({path for _, path in jobs})
+
+    # 詞彙 → 存檔
+    for index, dictionary in enumerate(dictionaries):
+        source = (words_file, affix_file)[index]
+        for word in dictionary:
+            if word in archive_words or aliases.get(word.strip().lower()) in archive_words:
+                continue
+            outcome = (manifest.get(word) or {}).get("outcome")
+            yield finding("not_found" if outcome == "not_found" else "missing_archive", file=source, word=word)
+
+    # 存檔 → 詞彙
+    referenced = set(dictionaries[0]) | set(dictionaries[1]) | set(aliases.values())
+    referenced |= {entry["stem"] for entry in manifest.values() if entry.get("stem")}
+    for word in sorted(archive_words - referenced):
+        yield finding("orphan_archive", file=join(archive_dir, f"{word}.md"), word=word)
+
+    # 章節 ↔ 合併後的字典
+    first_seen: dict[str, tuple[str, int]] = {}
+    in_chapters: tuple[set[str], set[str]] = (set(), set())
+    for path in chapters:
+        chapter = chapter_results.get(path)
+        if chapter is None:
+            continue
+        for index, word, meanings, line_no in chapter["entries"]:
+            in_chapters[index].add(word)
+            if word in first_seen:
+                other, other_line = first_seen[word]
+                yield finding("chapter_duplicate", file=path, line=line_no, word=word, detail=f"{other} 第 {other_line} 行")
+            else:
+                first_seen[word] = (path, line_no)
+            definition = dictionaries[index].get(word)
+            if definition is None:
+                yield finding("not_in_dictionary", file=path, line=line_no, word=word)
+                continue
+            merged = set(definition.split("、"))
+            missing = [meaning for meaning in meanings if meaning not in merged]
+            if missing:
+                yield finding("missing_meaning", file=path, line=line_no, word=word, detail="、".join(missing))
+    for index, dictionary in enumerate(dictionaries):
+        for word in sorted(set(dictionary) - in_chapters[index]):
+            yield finding("not_in_chapters", file=(words_file, affix_file)[index], word=word)
+
+
+def append_missing(list_file: str, words: list[str]) -> int:
+    """把清單中還沒有的單字附加到檔尾，既有的行 (包含 * 標記行) 保持不動，回傳實際新增的數量"""
+    existing = set(iter_listed_words(list_file))
+    added = [word for word in unique(words) if word not in existing]
+    if not added:
+        return 0
+    needs_newline = False
+    if exists(list_file):
+        with open(list_file, "rb") as f:
+            f.seek(0, 2)
+            if f.tell():
+                f.seek(-1, 2)
+                needs_newline = f.read(1) != b"\n"
+    with open(list_file, "a", encoding="utf-8") as f:
+        f.write(("\n" if needs_newline else "") + "".join(word + "\n" for word in added))
+    return len(added)
+
+
+def main(argv: list[str] | None = None, stream: TextIO = sys.stdout) -> int:
+    parser = argparse.ArgumentParser(description="檢查詞彙、章節與辭源存檔的一致性，以 JSONL 輸出")
+    parser.add_argument("--archive", default=DEFAULT_ARCHIVE_DIR)
+    parser.add_argument("--words", default=WORDS_FILE)
+    parser.add_argument("--affix", default=AFFIX_FILE)
+    parser.add_argument("--output", help="JSONL 輸出檔，預設為標準輸出")
+    parser.add_argument("--missing", help="把缺少存檔的單字附加到此清單 (如 new.txt)")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--no-cache", action="store_true", help="不使用也不更新 mtime 快取")
+    args = parser.parse_args(argv)
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else stream
+    counts: dict[str, int] = {}
+    missing: list[str] = []
+    try:
+        for item in audit(args.archive, args.words, args.affix, cache_file=None if args.no_cache else AUDIT_CACHE_FILE, workers=args.workers):
+            counts[item["check"]] = counts.get(item["check"], 0) + 1
+            if item["check"] == "missing_archive":
+                missing.append(item["word"])
+            output.write(json.dumps(item, ensure_ascii=False) + "\n")
+    finally:
+        if output is not stream:
+            output.close()
+    summary = "、".join(f"{check} {count}" for check, count in sorted(counts.items())) or "沒有發現問題"
+    print(f"檢查完成：{summary}", file=sys.stderr)
+    if args.missing:
+        added = append_missing(args.missing, missing)
+        print(f"已將 {added} 個缺少存檔的單字加入 {args.missing}", file=sys.stderr)
+    return 1 if any(SEVERITY[check] == "error" for check in counts) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""比較 remove_duplicates 新舊合併演算法的輸出與耗時
+
+用法 (於專案根目錄)：python -m benchmarks.dedup [條目數，預設 100000]
+於暫存目錄產生合成章節與字典，分別執行舊版 (f1(); f2(); f1()) 與單次掃描版，
+逐位元組比對所有輸出檔案；另外量測只修改一個章節後的增量建置耗時。
+"""
+
+import sys, time, random, shutil, tempfile, contextlib, io
+from os import chdir, getcwd, makedirs
+from os.path import join
+from remove_duplicates import remove_duplicates, build
+
+CHAPTERS = [f"./chapter_{c}/{c}-{i}.txt" for c in (1, 2) for i in range(8)]
+
+
+def legacy_remove_duplicates(files: list[str]) -> None:
+    """原本的實作 (僅改為明確使用 utf-8)，作為輸出比對基準"""
+
+    def f1():
+        words: list[tuple[str, str, str]] = []
+        affix: list[tuple[str, str, str]] = []
+        for file in files:
+            with open(file, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+                for i, line in enumerate(lines):
+                    t = line.split(":")
+                    if len(t) == 2:
+                        if t[0].startswith("-") or t[0].endswith("-"):
+                            affix.append((t[0].strip(), t[1].strip(), file + " line " + str(i + 1)))
+                        else:
+                            words.append((t[0].strip(), t[1].strip(), file + " line " + str(i + 1)))
+
+        def f3(l: list[tuple[str, str, str]], filename: str):
+            # 與舊版相同的三步轉換，各步驟使用不同的變數名稱以免型別衝突
+            with open(filename, "r", encoding="utf-8") as f:
+                file_lines = f.readlines()
+            raw = dict(line.split(": ", 2) for line in file_lines)
+            stripped = {k: v.replace("\n", "") for k, v in raw.items()}
+            data = {k: v.split("、") for k, v in stripped.items()}
+            l.sort(key=lambda x: x[0])
+            p: tuple[str, str, str] = ("", "", "")
+            result: list[str] = []
+            for i in l:
+                if i[0] == p[0]:
+                    if p[0] in data:
+                        p = (i[0], "、".join(sorted(list(set(p[1].split("、") + i[1].split("、") + data[p[0]])))), p[2])
+                    else:
+                        p = (i[0], "、".join(sorted(list(set(p[1].split("、") + i[1].split("、"))))), p[2])
+                    print(f"{i[0]}: {i[1]} [in {i[2]}]")
+                else:
+                    if p[0] != "":
+                        if p[0] in data:
+                            result.append(f"{p[0]}: {'、'.join(sorted(list(set(p[1].split('、') + data[p[0]]))))}\n")
+                        else:
+                            result.append(f"{p[0]}: {p[1]}\n")
+                    p = i
+            if p[0] != "":
+                if p[0] in data:
+                    result.append(f"{p[0]}: {'、'.join(sorted(list(set(p[1].split('、') + data[p[0]]))))}\n")
+                else:
+                    result.append(f"{p[0]}: {p[1]}\n")
+            result.sort()
+            with open(filename, "w", encoding="utf-8") as f:
+                f.write("".join(result))
+
+        f3(words, "words.txt")
+        f3(affix, "affix.txt")
+
+    def f2():
+        for input_f in files:
+            data: set[str] = set()
+            for f in files:
+                if f == input_f:
+                    break
+                with open(f, "r", encoding="utf-8") as file:
+                    for line in file:
+                        data.add(line.split(": ")[0].strip())
+            with open(input_f, "r", encoding="utf-8") as file:
+                lines = file.readlines()
+            with open(input_f, "w", encoding="utf-8") as file:
+                for line in lines:
+                    if line.split(": ")[0].strip() not in data:
+                        file.write(line)
+                        data.add(line.split(": ")[0].strip())
+
+    f1()
+    f2()
+    f1()
+
+
+def generate_corpus(directory: str, entries: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    meanings = [chr(0x4E00 + i) + chr(0x4E00 + i * 7 % 20000) for i in range(2000)]
+    # 每個單字平均出現約 10 次，模擬同義詞不斷累積的情況
+    vocabulary = [f"word{i}" for i in range(entries // 10)] + [f"-suf{i}" for i in range(entries // 200)] + [f"pre{i}-" for i in range(entries // 200)]
+    per_chapter = entries // len(CHAPTERS)
+    for chapter in CHAPTERS:
+        makedirs(join(directory, chapter.rsplit("/", 1)[0]), exist_ok=True)
+        with open(join(directory, chapter), "w", encoding="utf-8") as f:
+            for _ in range(per_chapter):
+                f.write(f"{rng.choice(vocabulary)}: {'、'.join(rng.sample(meanings, rng.randint(1, 8)))}\n")
+    for filename, keys in (("words.txt", vocabulary[: entries // 6]), ("affix.txt", [w for w in vocabulary if w.endswith("-")])):
+        with open(join(directory, filename), "w", encoding="utf-8") as f:
+            f.writelines(f"{k}: {'、'.join(rng.sample(meanings, 3))}\n" for k in keys)
+
+
+def run_in(directory: str, func) -> float:
+    cwd = getcwd()
+    chdir(directory)
+    try:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+        return time.perf_counter() - start
+    finally:
+        chdir(cwd)
+
+
+def main() -> int:
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    root = tempfile.mkdtemp()
+    try:
+        legacy_dir, new_dir = join(root, "legacy"), join(root, "new")
+        generate_corpus(legacy_dir, entries)
+        shutil.copytree(legacy_dir, new_dir)
+        legacy_time = run_in(legacy_dir, lambda: legacy_remove_duplicates(CHAPTERS))
+        new_time = run_in(new_dir, lambda: remove_duplicates(CHAPTERS))
+        different = []
+        for filename in CHAPTERS + ["words.txt", "affix.txt"]:
+            with open(join(legacy_dir, filename), "rb") as a, open(join(new_dir, filename), "rb") as b:
+                if a.read() != b.read():
+                    different.append(filename)
+        for filename in different:
+            print(f"輸出不一致：{filename}")
+        print(f"{entries} 條目：舊版 {legacy_time:.3f}s，單次掃描 {new_time:.3f}s，加速 {legacy_time / new_time:.1f}x")
+        run_in(new_dir, lambda: build(CHAPTERS))
+        with open(join(new_dir, CHAPTERS[-1]), "a", encoding="utf-8") as f:
+            f.write("benchmarkword: 測試\n")
+        incremental_time = run_in(new_dir, lambda: build(CHAPTERS))
+        print(f"修改最後一個章節後的增量建置：{incremental_time:.3f}s")
+        return 1 if different else 0
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""比較 bs4 與串流擷取 (page_extractor) 的輸出與每頁解析時間
+
+用法 (於專案根目錄)：python -m benchmarks.extractor [已儲存的 html 目錄 | 存檔目錄中的 .html_cache.sqlite]
+未指定時使用合成頁面。指定 HTML 快取時比對實際抓取過的頁面，並把串流擷取的結果重新產生 Markdown，
+與同一目錄中現有的存檔比較。兩種引擎輸出不一致或與存檔不符時以非零狀態結束；
+切換 fast_parse 的預設值前應先以實際的快取執行一次。
+"""
+
+import sys, time
+from os import listdir
+from os.path import dirname, exists, join
+from etymonline import EtymonlineWordScraper, parse_page
+from html_cache import HtmlCache
+
+
+def synthetic_page(word: str, sections: int = 3, paragraphs: int = 6) -> str:
+    body: list[str] = []
+    for i in range(sections):
+        content: list[str] = []
+        for j in range(paragraphs):
+            content.append(
+                f"<p>{word} 第 {j} 段，來自拉丁語 <a href=\"/word/ferre\">ferre</a> 與 <a href=\"/word/{word}{j}\">{word}{j}</a>"
+                f" &amp; 古法語<button>分享</button><span>(見 <i>-ion</i>)</span></p>"
+            )
+            if j % 3 == 2:
+                content.append(f"<blockquote>Quote {j} about <b>{word}</b> &gt; more</blockquote>")
+        content.append('<div class="ad-space"><script>ads()</script>廣告</div>')
+        body.append(
+            f'<div class="flex"><div class="p-4"><h2 class="scroll-m-16 text-xl">{word} (v.{i})</h2>'
+            f"<button>複製</button></div><section class=\"prose\">{''.join(content)}</section></div>"
+        )
+    nav = "".join(f'<li><a href="/word/nav{k}">nav{k}</a></li>' for k in range(200))
+    return (
+        f"<!DOCTYPE html><html><head><title>{word} | Etymonline</title><script>var x = 1;</script></head>"
+        f"<body><header><ul>{nav}</ul></header><main><h1>{word}</h1>{''.join(body)}</main><footer>{nav}</footer></body></html>"
+    )
+
+
+def load_pages(html_dir: str | None) -> list[tuple[str, str]]:
+    if html_dir is None:
+        return [(f"word{i}", synthetic_page(f"word{i}")) for i in range(200)]
+    if html_dir.endswith(".sqlite"):
+        cache = HtmlCache(html_dir)
+        try:
+            return list(cache.items())
+        finally:
+            cache.conn.close()
+    pages: list[tuple[str, str]] = []
+    for f_name in sorted(listdir(html_dir)):
+        if f_name.endswith(".html"):
+            with open(join(html_dir, f_name), "r", encoding="utf-8") as f:
+                pages.append((f_name[: -len(".html")], f.read()))
+    return pages
+
+
+def archive_mismatches(archive_dir: str, pages: list[tuple[str, str]]) -> list[str]:
+    """以串流擷取重新產生 Markdown，與存檔中已有的檔案比較 (沒有存檔的單字略過)"""
+    mismatches: list[str] = []
+    for word, page in pages:
+        md_path = join(archive_dir, f"{word}.md")
+        word_data = parse_page(word, page, True)
+        if word_data is None or not word_data[1] or not exists(md_path):
+            continue
+        with open(md_path, "r", encoding="utf-8") as f:
+            if f.read() != EtymonlineWordScraper.render_markdown(word_data):
+                mismatches.append(word)
+    return mismatches
+
+
+def main() -> int:
+    source = sys.argv[1] if len(sys.argv) > 1 else None
+    pages = load_pages(source)
+    if not pages:
+        print("找不到任何頁面")
+        return 1
+    mismatches = [word for word, page in pages if parse_page(word, page, False) != parse_page(word, page, True)]
+    for word in mismatches:
+        print(f"[{word}] 兩種引擎輸出不一致")
+    if source is not None and source.endswith(".sqlite"):
+        archived = archive_mismatches(dirname(source) or ".", pages)
+        for word in archived:
+            print(f"[{word}] 串流擷取產生的 Markdown 與存檔不符")
+        mismatches += archived
+    for name, fast in (("bs4", False), ("stream", True)):
+        start = time.perf_counter()
+        for word, page in pages:
+            parse_page(word, page, fast)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<7}: {elapsed / len(pages) * 1000:.3f} ms/頁 ({len(pages)} 頁)")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
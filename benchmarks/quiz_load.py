@@ -0,0 +1,114 @@
+"""quiz_server 的負載測試
+
+用法 (於專案根目錄)：python -m benchmarks.quiz_load [--users 300] [--rounds 5] [--count 10] [--websocket] [--url http://host:port]
+未指定 --url 時在本機隨機埠啟動伺服器 (使用 words.txt 與暫存的使用者目錄)。
+每個模擬使用者重複「取題 → 送出答案 (約一半答對) → 確認模糊的題目」，最後回報每秒請求數與延遲分位數。
+"""
+
+import sys, json, time, random, shutil, asyncio, argparse, tempfile
+import aiohttp
+from aiohttp import web
+from quiz_server import QuizService, create_app
+from quiz_constants import DEFAULT_VOCABULARY_FILE
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies: list[float] = []
+        self.errors = 0
+
+    def quantile(self, q: float) -> float:
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def make_answers(words: list[str], vocabulary: dict[str, str], rng: random.Random) -> list[list[str]]:
+    return [[word, vocabulary[word].split("、")[0] if rng.random() < 0.5 else "不知道"] for word in words]
+
+
+async def http_user(session: aiohttp.ClientSession, url: str, name: str, args: argparse.Namespace, vocabulary: dict[str, str], recorder: Recorder) -> None:
+    rng = random.Random(name)
+
+    async def call(method: str, path: str, payload: dict | None = None) -> dict:
+        start = time.perf_counter()
+        async with session.request(method, f"{url}/api/{name}/{path}", json=payload) as response:
+            data = await response.json() if response.status == 200 else None
+        recorder.latencies.append(time.perf_counter() - start)
+        if data is None:
+            recorder.errors += 1
+            return {}
+        return data
+
+    for _ in range(args.rounds):
+        words = (await call("GET", f"words?count={args.count}")).get("words", [])
+        results = (await call("POST", "answers", {"answers": make_answers(words, vocabulary, rng)})).get("results", [])
+        uncertain = [[item["word"], rng.random() < 0.5] for item in results if item["result"] is None]
+        if uncertain:
+            await call("POST", "confirm", {"results": uncertain})
+
+
+async def websocket_user(session: aiohttp.ClientSession, url: str, name: str, args: argparse.Namespace, vocabulary: dict[str, str], recorder: Recorder) -> None:
+    rng = random.Random(name)
+    async with session.ws_connect(f"{url}/ws/{name}") as ws:
+
+        async def call(message: dict) -> dict:
+            start = time.perf_counter()
+            await ws.send_str(json.dumps(message, ensure_ascii=False))
+            data = json.loads(await ws.receive_str())
+            recorder.latencies.append(time.perf_counter() - start)
+            if data.get("type") == "error":
+                recorder.errors += 1
+            return data
+
+        for _ in range(args.rounds):
+            words = (await call({"type": "words", "count": args.count})).get("words", [])
+            results = (await call({"type": "answers", "answers": make_answers(words, vocabulary, rng)})).get("results", [])
+            uncertain = [[item["word"], rng.random() < 0.5] for item in results if item["result"] is None]
+            if uncertain:
+                await call({"type": "confirm", "results": uncertain})
+
+
+async def run(args: argparse.Namespace) -> Recorder:
+    data_dir = tempfile.mkdtemp()
+    service = QuizService(args.vocabulary, data_dir)
+    runner = None
+    url = args.url
+    try:
+        if url is None:
+            runner = web.AppRunner(create_app(service))
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            host, port = runner.addresses[0][:2]
+            url = f"http://{host}:{port}"
+        recorder = Recorder()
+        user = websocket_user if args.websocket else http_user
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0)) as session:
+            start = time.perf_counter()
+            await asyncio.gather(*(user(session, url, f"user{i}", args, service.vocabulary, recorder) for i in range(args.users)))
+            elapsed = time.perf_counter() - start
+        total = len(recorder.latencies)
+        print(f"{args.users} 位使用者、每位 {args.rounds} 輪{' (WebSocket)' if args.websocket else ''}：{total} 個請求，{elapsed:.2f} 秒")
+        print(f"  {total / elapsed:.1f} 請求/秒  錯誤 {recorder.errors}")
+        print("  延遲 " + "  ".join(f"p{int(q * 100)} {recorder.quantile(q) * 1000:.1f} ms" for q in (0.5, 0.95, 0.99)))
+        return recorder
+    finally:
+        if runner is not None:
+            await runner.cleanup()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="quiz_server 負載測試")
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--count", type=int, default=10, help="每輪題數")
+    parser.add_argument("--websocket", action="store_true", help="改用 WebSocket 連線")
+    parser.add_argument("--vocabulary", default=DEFAULT_VOCABULARY_FILE)
+    parser.add_argument("--url", help="已在執行的伺服器，預設在本機啟動一個")
+    recorder = asyncio.run(run(parser.parse_args()))
+    return 1 if recorder.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""比較 log.json 整份重寫與日誌附加的保存/讀取耗時
+
+用法 (於專案根目錄)：python -m benchmarks.review_log [條目數 ...，預設 10000 100000 1000000]
+每種大小各模擬一次 20 題測試：舊版為過濾、兩次排序後以 indent=4 重寫 log.json；
+新版為附加 20 行並 fsync。讀取則比較 json.load 與快照加上 1000 筆日誌事件的重播。
+"""
+
+import sys, json, time, random, shutil, tempfile
+from os.path import join
+from review_journal import ReviewJournal, write_snapshot
+
+ANSWERS = 20
+TAIL_EVENTS = 1000
+
+
+def legacy_save_log(file_path: str, log: dict[str, int]) -> None:
+    """原本 VocabularyTester.save_log 的寫法"""
+    filtered_log = {k: v for k, v in log.items() if v != 0}
+    sorted_log = dict(sorted(filtered_log.items(), key=lambda item: item[0]))
+    sorted_log = dict(sorted(sorted_log.items(), key=lambda item: item[1], reverse=True))
+    with open(file_path, "w", encoding="utf-8") as log_file:
+        json.dump(sorted_log, log_file, indent=4, ensure_ascii=False)
+
+
+def legacy_load_log(file_path: str) -> dict[str, int]:
+    with open(file_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def journal_load(log_file: str, journal: ReviewJournal) -> dict[str, int]:
+    log = legacy_load_log(log_file)
+    if journal.applies_to(log_file):
+        for word, correct, _ in journal.events():
+            log[word] = log.get(word, 0) + (1 if correct else -1)
+    return log
+
+
+def timed(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def run(entries: int, directory: str, rng: random.Random) -> tuple[float, float, float, float]:
+    log = {f"word{i}": rng.choice((-3, -2, -1, 1, 2, 3, 4)) for i in range(entries)}
+    words = list(log)
+    results = [(rng.choice(words), rng.random() < 0.7) for _ in range(ANSWERS)]
+    legacy_file = join(directory, "legacy.json")
+    legacy_save_log(legacy_file, log)
+    legacy_save = timed(lambda: legacy_save_log(legacy_file, log))
+    legacy_load = timed(lambda: legacy_load_log(legacy_file))
+
+    log_file = join(directory, "log.json")
+    write_snapshot(log_file, json.dumps(log, indent=4, ensure_ascii=False))
+    journal = ReviewJournal(join(directory, "log.journal.jsonl"))
+    journal.reset([log_file])
+    for _ in range(TAIL_EVENTS // ANSWERS):
+        journal.append(results)
+    journal_save = timed(lambda: journal.append(results))
+    journal_read = timed(lambda: journal_load(log_file, ReviewJournal(journal.file_path)))
+    return (legacy_save, journal_save, legacy_load, journal_read)
+
+
+def main() -> int:
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 1000000]
+    rng = random.Random(0)
+    print(f"{'條目數':>10} {'舊版保存':>10} {'日誌保存':>10} {'舊版讀取':>10} {'快照+重播':>10}")
+    for entries in sizes:
+        directory = tempfile.mkdtemp()
+        try:
+            legacy_save, journal_save, legacy_load, journal_read = run(entries, directory, rng)
+        finally:
+            shutil.rmtree(directory)
+        print(f"{entries:>10} {legacy_save * 1000:>10.1f}ms {journal_save * 1000:>8.2f}ms {legacy_load * 1000:>8.1f}ms {journal_read * 1000:>8.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
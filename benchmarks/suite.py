@@ -0,0 +1,202 @@
+"""爬蟲解析、去重合併與測驗熱路徑的基準測試套件
+
+用法 (於專案根目錄)：
+    python -m benchmarks.suite [--sizes 1000 10000] [--repeat 5] [--output 結果.json] [--compare 舊結果.json]
+每個大小會在暫存目錄產生合成資料：章節檔、含大量「、」同義詞的 words.txt、log.json，
+以及寫成 .html 檔的 etymonline 頁面 (完整管線透過 FixtureTransport 從這些檔案「抓取」)。結果以 JSON 儲存 (含 commit)，可用 --compare 比較不同 commit。
+"""
+
+import sys, io, json, time, random, shutil, asyncio, argparse, platform, statistics, subprocess, tempfile, contextlib
+from os import chdir, getcwd, makedirs
+from os.path import join
+from typing import Any, Callable
+from bs4 import BeautifulSoup
+from etymonline import EtymonlineWordScraper, parse_page
+from fetch_scheduler import FetchScheduler
+from scrape_metrics import ScrapeMetrics
+from transport import FixtureTransport
+from remove_duplicates import remove_duplicates
+from test import VocabularyTester
+from benchmarks.dedup import CHAPTERS, generate_corpus
+from benchmarks.extractor import load_pages, synthetic_page
+
+# 每多少個詞彙條目產生一頁 HTML
+ENTRIES_PER_PAGE = 50
+TEST_COUNT = 20
+
+
+def measure(func: Callable[[], Any], repeat: int, setup: Callable[[], Any] | None = None) -> dict[str, float]:
+    """執行 repeat 次 (每次之前呼叫 setup，不計時)，回傳秒數的最小值、中位數與平均"""
+    timings: list[float] = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {"min": min(timings), "median": statistics.median(timings), "mean": statistics.fmean(timings), "runs": repeat}
+
+
+@contextlib.contextmanager
+def quiet_in(directory: str):
+    """在指定目錄下執行並丟棄標準輸出"""
+    cwd = getcwd()
+    chdir(directory)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        chdir(cwd)
+
+
+def write_fixtures(directory: str, pages: int) -> list[tuple[str, str]]:
+    makedirs(directory, exist_ok=True)
+    for i in range(pages):
+        with open(join(directory, f"word{i}.html"), "w", encoding="utf-8") as f:
+            f.write(synthetic_page(f"word{i}", sections=1 + i % 4))
+    return load_pages(directory)
+
+
+def write_vocabulary(directory: str, entries: int, rng: random.Random) -> None:
+    meanings = [chr(0x4E00 + i) + chr(0x4E00 + i * 7 % 20000) + ("的" if i % 5 == 0 else "") for i in range(3000)]
+    with open(join(directory, "words.txt"), "w", encoding="utf-8") as f:
+        for i in range(entries):
+            synonyms = rng.sample(meanings, rng.randint(1, 12))
+            if i % 7 == 0:
+                synonyms.append(f"(= synonym{i})")
+            f.write(f"word{i}: {'、'.join(synonyms)}\n")
+    log = {f"word{i}": rng.randint(-5, 10) for i in range(0, entries, 3)}
+    with open(join(directory, "log.json"), "w", encoding="utf-8") as f:
+        json.dump(log, f, ensure_ascii=False)
+
+
+def bench_scraper(directory: str, size: int, repeat: int) -> dict[str, dict[str, float]]:
+    pages = write_fixtures(join(directory, "html"), max(1, size // ENTRIES_PER_PAGE))
+    soups = [(word, BeautifulSoup(page, "html.parser")) for word, page in pages]
+    data = [parse_page(word, page) for word, page in pages]
+    with quiet_in(directory):
+        scraper = EtymonlineWordScraper([], join(directory, "archive"))
+
+        def save_all() -> None:
+            for item in data:
+                if item is not None:
+                    scraper.save_to_markdown(item[0], item)
+
+        results = {
+            "walk": measure(lambda: [EtymonlineWordScraper.walk(word, soup) for word, soup in soups], repeat),
+            "save_to_markdown": measure(save_all, repeat),
+        }
+        scraper.html_cache.close()
+    return results
+
+
+def bench_pipeline(directory: str, size: int, repeat: int) -> dict[str, dict[str, float]]:
+    html_dir = join(directory, "html")
+    archive = join(directory, "pipeline")
+    words = [word for word, _ in write_fixtures(html_dir, max(1, size // ENTRIES_PER_PAGE))]
+
+    def run() -> None:
+        # 不限速，只量測管線本身
+        scraper = EtymonlineWordScraper(
+            list(words),
+            archive,
+            refresh=True,
+            scheduler=FetchScheduler(rate=1e9, burst=10**9),
+            parse_workers=2,
+            fast_parse=True,
+            metrics=ScrapeMetrics(stream=io.StringIO()),
+            transport=FixtureTransport(html_dir),
+        )
+        asyncio.run(scraper.run())
+        scraper.html_cache.close()
+
+    with quiet_in(directory):
+        return {"pipeline": measure(run, repeat, lambda: shutil.rmtree(archive, ignore_errors=True))}
+
+
+def bench_dedup(directory: str, size: int, repeat: int) -> dict[str, dict[str, float]]:
+    corpus = join(directory, "corpus")
+    files = [join(corpus, chapter) for chapter in CHAPTERS]
+
+    # 章節檔每次都會被改寫，所以每次計時前重新產生
+    def setup() -> None:
+        shutil.rmtree(corpus, ignore_errors=True)
+        generate_corpus(corpus, size)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = measure(lambda: remove_duplicates(files, join(corpus, "words.txt"), join(corpus, "affix.txt")), repeat, setup)
+    return {"remove_duplicates": result}
+
+
+def bench_tester(directory: str, size: int, repeat: int) -> dict[str, dict[str, float]]:
+    rng = random.Random(size)
+    vocabulary_dir = join(directory, "tester")
+    makedirs(vocabulary_dir, exist_ok=True)
+    write_vocabulary(vocabulary_dir, size, rng)
+    with quiet_in(vocabulary_dir):
+        tester = VocabularyTester("words.txt")
+        words = tester.choose_words(TEST_COUNT)
+        # 只使用完全相符或略過的答案，避免進入人工確認
+        answers = [tester.vocabulary[word].split("、")[0] if i % 4 else "n" for i, word in enumerate(words)]
+        return {
+            "choose_words": measure(lambda: tester.choose_words(TEST_COUNT), repeat),
+            "check_answers": measure(lambda: tester.check_answers(words, answers), repeat),
+            "save_log": measure(lambda: tester.save_log(tester.log), repeat),
+        }
+
+
+BENCHMARKS = (bench_scraper, bench_pipeline, bench_dedup, bench_tester)
+
+
+def current_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(results: dict[str, dict[str, dict[str, float]]], baseline_file: str) -> None:
+    with open(baseline_file, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\n與 {baseline.get('commit') or baseline_file} 比較 (中位數，<1 表示變快)：")
+    for size, cases in results.items():
+        for name, stats in cases.items():
+            old = baseline["results"].get(size, {}).get(name)
+            if old:
+                print(f"  {name:<18} {size:>8}: {stats['median'] / old['median']:.2f}x")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="執行基準測試並輸出 JSON")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="詞彙條目數")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="結果 JSON 檔，預設為 benchmarks/results-<commit>.json")
+    parser.add_argument("--compare", help="要比較的先前結果 JSON 檔")
+    args = parser.parse_args()
+
+    commit = current_commit()
+    results: dict[str, dict[str, dict[str, float]]] = {}
+    for size in args.sizes:
+        directory = tempfile.mkdtemp()
+        try:
+            cases: dict[str, dict[str, float]] = {}
+            for bench in BENCHMARKS:
+                cases.update(bench(directory, size, args.repeat))
+        finally:
+            shutil.rmtree(directory)
+        results[str(size)] = cases
+        for name, stats in cases.items():
+            print(f"{name:<18} {size:>8}: 中位數 {stats['median'] * 1000:10.2f} ms  最小 {stats['min'] * 1000:10.2f} ms")
+
+    output = args.output or join("benchmarks", f"results-{commit or 'unknown'}.json")
+    report = {"commit": commit, "python": platform.python_version(), "timestamp": time.time(), "repeat": args.repeat, "results": results}
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"結果已寫入 {output}")
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
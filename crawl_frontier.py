@@ -0,0 +1,237 @@
+import re, json, math, sqlite3, hashlib
+from array import array
+from os import replace
+from os.path import exists
+from typing import Iterable, Iterator
+from urllib.parse import unquote
+
+# render_markdown 輸出的站內連結，如 [ferre](https://www.etymonline.com/tw/word/ferre)
+WORD_LINK_RE = re.compile(r"\]\(https://www\.etymonline\.com/tw/word/([^)?#\s]+)")
+GRAPH_VERSION = 1
+# 節點狀態：待抓取、已放入抓取隊列、已完成
+PENDING, QUEUED, DONE = 0, 1, 2
+
+
+def linked_words(markdown: str) -> list[str]:
+    """Markdown 中連到其他單字頁面的 slug，保留第一次出現的順序"""
+    return list(dict.fromkeys(unquote(slug) for slug in WORD_LINK_RE.findall(markdown)))
+
+
+class BloomFilter:
+    """固定大小的 Bloom filter：不在其中的一定沒看過，在其中的才需要查磁碟"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, key: str) -> Iterator[int]:
+        # 兩個 64 位元雜湊組合出 k 個位置 (Kirsch–Mitzenmacher)
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str) -> None:
+        for position in self.positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(key))
+
+
+class LinkGraph:
+    """單字之間的連結圖，單字編號後以 array 儲存出邊
+
+    存檔為 CSR 格式：一行 JSON 標頭、以換行分隔的單字，接著是 uint32 的 offsets 與 targets。
+    """
+
+    def __init__(self) -> None:
+        self.ids: dict[str, int] = {}
+        self.words: list[str] = []
+        self.edges: dict[int, array] = {}
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def intern(self, word: str) -> int:
+        node = self.ids.get(word)
+        if node is None:
+            node = self.ids[word] = len(self.words)
+            self.words.append(word)
+        return node
+
+    def has_links(self, word: str) -> bool:
+        return word in self.ids and self.ids[word] in self.edges
+
+    def links(self, word: str) -> list[str]:
+        node = self.ids.get(word)
+        return [self.words[target] for target in self.edges.get(node, ())] if node is not None else []
+
+    def set_links(self, word: str, targets: Iterable[str]) -> list[str]:
+        """取代單字的出邊，回傳新增的目標"""
+        node = self.intern(word)
+        old = set(self.edges.get(node, ()))
+        ids = array("I", (self.intern(target) for target in targets))
+        self.edges[node] = ids
+        return [self.words[target] for target in ids if target not in old]
+
+    def edge_count(self) -> int:
+        return sum(len(targets) for targets in self.edges.values())
+
+    def save(self, file_path: str) -> None:
+        offsets = array("I", [0])
+        targets = array("I")
+        for node in range(len(self.words)):
+            targets.extend(self.edges.get(node, ()))
+            offsets.append(len(targets))
+        tmp_path = file_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            header = {"version": GRAPH_VERSION, "nodes": len(self.words), "edges": len(targets)}
+            f.write(json.dumps(header).encode("utf-8") + b"\n")
+            f.write("".join(word + "\n" for word in self.words).encode("utf-8"))
+            offsets.tofile(f)
+            targets.tofile(f)
+        replace(tmp_path, file_path)
+
+    @classmethod
+    def load(cls, file_path: str) -> "LinkGraph":
+        graph = cls()
+        if not exists(file_path):
+            return graph
+        with open(file_path, "rb") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != GRAPH_VERSION:
+                return graph
+            graph.words = [f.readline().decode("utf-8").rstrip("\n") for _ in range(header["nodes"])]
+            graph.ids = {word: node for node, word in enumerate(graph.words)}
+            offsets = array("I")
+            offsets.fromfile(f, header["nodes"] + 1)
+            targets = array("I")
+            targets.fromfile(f, header["edges"])
+        for node in range(header["nodes"]):
+            if offsets[node + 1] > offsets[node]:
+                graph.edges[node] = targets[offsets[node] : offsets[node + 1]]
+        return graph
+
+
+class CrawlFrontier:
+    """沿著頁面中的辭源連結擴展抓取範圍的待抓取清單
+
+    所有看過的單字存在 SQLite (深度、入度、狀態)，記憶體中只有 Bloom filter 與連結圖；
+    待抓取的單字依與詞彙的距離 (深度) 由近到遠、同深度依入度 (被多少頁面引用) 由高到低取出。
+    已完成的單字跨執行保留，中斷後再執行會從剩下的待抓取單字繼續；刪除檔案即可重新開始。
+    """
+
+    def __init__(
+        self, file_path: str, graph_file: str, max_depth: int = 2, budget: int = 1000, capacity: int = 1_000_000
+    ) -> None:
+        self.file_path = file_path
+        self.graph_file = graph_file
+        self.max_depth = max_depth
+        self.budget = budget
+        self.popped = 0
+        # 本次執行中出錯而放回待抓取的單字，留到下次執行再重試
+        self.failed: set[str] = set()
+        self.conn = sqlite3.connect(file_path)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS nodes (
+                word TEXT PRIMARY KEY, depth INTEGER NOT NULL, indegree INTEGER NOT NULL DEFAULT 0, state INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS frontier ON nodes (state, depth, indegree DESC);
+            """
+        )
+        # 上次中斷時已放入隊列但未完成的單字放回待抓取
+        self.conn.execute("UPDATE nodes SET state = ? WHERE state = ?", (PENDING, QUEUED))
+        self.seen = BloomFilter(capacity)
+        for (word,) in self.conn.execute("SELECT word FROM nodes"):
+            self.seen.add(word)
+        self.graph = LinkGraph.load(graph_file)
+
+    def state(self, word: str) -> int | None:
+        if word not in self.seen:
+            return None
+        row = self.conn.execute("SELECT state FROM nodes WHERE word = ?", (word,)).fetchone()
+        return row[0] if row else None
+
+    def __contains__(self, word: str) -> bool:
+        """是否已完成，讓 frontier 可以取代抓取管線的 processed 集合"""
+        return self.state(word) == DONE
+
+    def upsert(self, word: str, depth: int, state: int) -> None:
+        self.seen.add(word)
+        self.conn.execute(
+            "INSERT INTO nodes (word, depth, state) VALUES (?, ?, ?) "
+            "ON CONFLICT (word) DO UPDATE SET depth = MIN(depth, excluded.depth), state = excluded.state",
+            (word, depth, state),
+        )
+
+    def add(self, word: str) -> None:
+        """標記為已完成，保留原有的深度"""
+        self.seen.add(word)
+        self.conn.execute(
+            "INSERT INTO nodes (word, depth, state) VALUES (?, 0, ?) ON CONFLICT (word) DO UPDATE SET state = excluded.state", (word, DONE)
+        )
+
+    def retry(self, word: str) -> None:
+        """抓取或解析失敗：放回待抓取，本次執行不再取出"""
+        self.failed.add(word)
+        self.upsert(word, self.depth(word), PENDING)
+
+    def queue_seed(self, word: str) -> None:
+        """直接放入抓取隊列的單字 (詞彙本身)，深度為 0"""
+        self.upsert(word, 0, QUEUED)
+
+    def depth(self, word: str) -> int:
+        row = self.conn.execute("SELECT depth FROM nodes WHERE word = ?", (word,)).fetchone() if word in self.seen else None
+        return row[0] if row else 0
+
+    def record_links(self, word: str, markdown: str) -> int:
+        """記錄單字頁面的連結；新出現的單字加入待抓取，已存在的入度加一。回傳新加入的單字數"""
+        targets = [target for target in linked_words(markdown) if target != word]
+        added = self.graph.set_links(word, targets)
+        depth = self.depth(word) + 1
+        new = 0
+        for target in added:
+            if target not in self.seen:
+                new += 1
+            self.seen.add(target)
+            self.conn.execute(
+                "INSERT INTO nodes (word, depth, indegree, state) VALUES (?, ?, 1, ?) "
+                "ON CONFLICT (word) DO UPDATE SET depth = MIN(depth, excluded.depth), indegree = indegree + 1",
+                (target, depth, PENDING),
+            )
+        return new
+
+    def pop_batch(self, limit: int) -> list[str]:
+        """取出下一批待抓取的單字並標記為已放入隊列，超過深度或預算時回傳空串列"""
+        limit = min(limit, self.budget - self.popped)
+        if limit <= 0:
+            return []
+        rows = self.conn.execute(
+            "SELECT word FROM nodes WHERE state = ? AND depth <= ? ORDER BY depth, indegree DESC LIMIT ?",
+            (PENDING, self.max_depth, limit + len(self.failed)),
+        ).fetchall()
+        words = [word for (word,) in rows if word not in self.failed][:limit]
+        self.conn.executemany("UPDATE nodes SET state = ? WHERE word = ?", ((QUEUED, word) for word in words))
+        self.popped += len(words)
+        return words
+
+    def pending_count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM nodes WHERE state = ? AND depth <= ?", (PENDING, self.max_depth)).fetchone()[0]
+
+    def summary(self) -> str:
+        return (
+            f"爬取：本次取出 {self.popped}/{self.budget} 個單字，尚有 {self.pending_count()} 個待抓取 (深度 <= {self.max_depth})，"
+            f"連結圖 {len(self.graph)} 個單字、{self.graph.edge_count()} 條連結"
+        )
+
+    def save(self) -> None:
+        self.conn.commit()
+        self.graph.save(self.graph_file)
+
+    def close(self) -> None:
+        self.save()
+        self.conn.close()
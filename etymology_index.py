@@ -0,0 +1,107 @@
+import mmap, struct
+from os import listdir, replace
+from os.path import exists, join
+
+DEFAULT_ARCHIVE_DIR = "etymology_archive"
+DEFAULT_INDEX_FILE = "etymology_archive.idx"
+MAGIC = b"ETYIDX01"
+HEADER = struct.Struct("<8sI")
+# 每筆索引：鍵位移、鍵長度、內容位移、內容長度
+ENTRY = struct.Struct("<IIII")
+
+
+def build_index(archive_dir: str = DEFAULT_ARCHIVE_DIR, index_file: str = DEFAULT_INDEX_FILE) -> int:
+    """將 etymology_archive/*.md 打包成單一檔案：依鍵排序的索引表 + 鍵 + 內容"""
+    entries: list[tuple[bytes, bytes]] = []
+    for f_name in listdir(archive_dir):
+        if not f_name.endswith(".md"):
+            continue
+        with open(join(archive_dir, f_name), "rb") as f:
+            entries.append((f_name[: -len(".md")].encode("utf-8"), f.read()))
+    entries.sort(key=lambda item: item[0])
+
+    keys_start = HEADER.size + ENTRY.size * len(entries)
+    data_start = keys_start + sum(len(key) for key, _ in entries)
+    table: list[bytes] = []
+    key_offset, data_offset = keys_start, data_start
+    for key, data in entries:
+        table.append(ENTRY.pack(key_offset, len(key), data_offset, len(data)))
+        key_offset += len(key)
+        data_offset += len(data)
+
+    tmp_path = index_file + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(entries)))
+        f.write(b"".join(table))
+        f.write(b"".join(key for key, _ in entries))
+        f.write(b"".join(data for _, data in entries))
+    replace(tmp_path, index_file)
+    return len(entries)
+
+
+class EtymologyIndex:
+    """以 mmap 開啟打包檔，二分搜尋鍵，查詢為 O(log n) 且不需開啟個別檔案"""
+
+    def __init__(self, index_file: str = DEFAULT_INDEX_FILE) -> None:
+        with open(index_file, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"'{index_file}' 不是辭源索引檔")
+
+    @classmethod
+    def open_if_exists(cls, index_file: str = DEFAULT_INDEX_FILE) -> "EtymologyIndex | None":
+        return cls(index_file) if exists(index_file) else None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def entry(self, i: int) -> tuple[int, int, int, int]:
+        return ENTRY.unpack_from(self.data, HEADER.size + ENTRY.size * i)
+
+    def key(self, i: int) -> bytes:
+        key_offset, key_len, _, _ = self.entry(i)
+        return self.data[key_offset : key_offset + key_len]
+
+    def find(self, word: str) -> int:
+        target = word.encode("utf-8")
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < self.count and self.key(lo) == target else -1
+
+    def get(self, word: str) -> str | None:
+        """取得單字的 Markdown 內容，找不到時再以小寫查詢一次"""
+        i = self.find(word)
+        if i < 0 and word.lower() != word:
+            i = self.find(word.lower())
+        if i < 0:
+            return None
+        _, _, data_offset, data_len = self.entry(i)
+        return self.data[data_offset : data_offset + data_len].decode("utf-8")
+
+    def sections(self, word: str) -> list[tuple[str, str]]:
+        """回傳 [(標題, 內文)]，對應 save_to_markdown 產生的每個 ## 區段"""
+        content = self.get(word)
+        if content is None:
+            return []
+        result: list[tuple[str, str]] = []
+        for block in content.split("\n## ")[1:]:
+            heading, _, body = block.partition("\n")
+            body = body.replace("\n---\n", "\n").strip()
+            result.append((heading.strip(), body))
+        return result
+
+    def words(self) -> list[str]:
+        return [self.key(i).decode("utf-8") for i in range(self.count)]
+
+    def close(self) -> None:
+        self.data.close()
+
+
+if __name__ == "__main__":
+    print(f"已打包 {build_index()} 個單字至 {DEFAULT_INDEX_FILE}")
@@ -1,44 +1,176 @@
-import asyncio, re, html, uuid
-import aiohttp
+import asyncio, re, html, uuid, json, hashlib, time, functools
 from bs4 import BeautifulSoup, Tag
 from bs4.element import NavigableString, PageElement
 from os.path import join, exists
-from os import makedirs, listdir
+from os import makedirs, listdir, remove, replace, cpu_count, stat
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Awaitable, Callable
 from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from fetch_scheduler import FetchScheduler
+import page_extractor
+from html_cache import HtmlCache
+from search_index import SearchIndex, ARCHIVE_SOURCE, DEFAULT_INDEX_FILE
+from vocabulary import iter_defined_words, iter_listed_words, unique
+from scrape_metrics import ScrapeMetrics
+from archive_writer import ArchiveWriter, WriteResult, write_file
+from transport import AiohttpTransport, Transport
+from alias_map import AliasMap, normalize_alias
+from crawl_frontier import CrawlFrontier
+
+MANIFEST_FILE = ".fetch_manifest.json"
+HTML_CACHE_FILE = ".html_cache.sqlite"
+ALIAS_FILE = ".aliases.json"
+CRAWL_FRONTIER_FILE = ".crawl_frontier.sqlite"
+LINK_GRAPH_FILE = ".link_graph.bin"
+# refresh 執行開始的時間；中斷後再執行時沿用，略過這之後已重新抓取的單字，整次完成後刪除
+REFRESH_FILE = ".refresh_run.json"
+# 不需要對應 .md 檔案即可視為完成的結果
+FINAL_OUTCOMES = ("not_found", "redirect", "empty")
+WordData = tuple[str, list[tuple[str, str, list[tuple[str, str]]]]]
+
+
+def file_digest(file_path: str) -> str:
+    with open(file_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class FetchManifest:
+    """記錄每個單字的抓取狀態 (時間、ETag/Last-Modified、內容雜湊、結果)，用於增量與續傳"""
+
+    def __init__(self, file_path: str, save_every: int = 20) -> None:
+        self.file_path = file_path
+        self.save_every = save_every
+        self.entries: dict[str, dict[str, Any]] = {}
+        self.dirty = 0
+        if exists(file_path):
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"讀取抓取清單時發生錯誤，將重新建立：{e}")
+
+    def get(self, word: str) -> dict[str, Any] | None:
+        return self.entries.get(word)
+
+    def is_current(self, word: str, md_path: str, since: float | None = None) -> bool:
+        """單字已完成且存檔內容與清單記錄一致；指定 since 時還必須是在該時間之後抓取的"""
+        entry = self.entries.get(word)
+        if entry is None:
+            return False
+        if since is not None and entry.get("fetched_at", 0) < since:
+            return False
+        if entry.get("outcome") in FINAL_OUTCOMES:
+            return True
+        if entry.get("outcome") != "saved" or not exists(md_path):
+            return False
+        return file_digest(md_path) == entry.get("hash")
+
+    def conditional_headers(self, word: str) -> dict[str, str]:
+        entry = self.entries.get(word) or {}
+        headers: dict[str, str] = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record(self, word: str, outcome: str, **fields: Any) -> None:
+        entry = self.entries.setdefault(word, {})
+        entry.update(fields)
+        entry["outcome"] = outcome
+        entry["fetched_at"] = time.time()
+        self.dirty += 1
+        if self.dirty >= self.save_every:
+            self.save()
+
+    def save(self) -> None:
+        """先寫入暫存檔再取代，避免中斷時損毀清單"""
+        if not self.dirty and exists(self.file_path):
+            return
+        tmp_path = self.file_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=1)
+        replace(tmp_path, self.file_path)
+        self.dirty = 0
 
 
 class EtymonlineWordScraper:
-    def __init__(self, words: list[str], output_dir: str = "etymology_test_archive") -> None:
+    def __init__(
+        self,
+        words: list[str],
+        output_dir: str = "etymology_test_archive",
+        refresh: bool = False,
+        scheduler: FetchScheduler | None = None,
+        site_url: str = "https://www.etymonline.com",
+        parse_workers: int | None = None,
+        fast_parse: bool = False,
+        search_index: SearchIndex | None = None,
+        metrics: ScrapeMetrics | None = None,
+        transport: Transport | None = None,
+        cache_bust: bool = False,
+        crawl_depth: int = 0,
+        crawl_budget: int = 1000,
+    ) -> None:
         self.words = words
+        self.known_words = set(words)
         self.output_dir = output_dir
-        self.base_url = "https://www.etymonline.com/tw/word/"
-        self.log: list[str] = []
+        self.refresh = refresh
+        # refresh 執行的開始時間，run() 時決定
+        self.refresh_started: float | None = None
+        self.scheduler = scheduler or FetchScheduler()
+        # 每個主機的連線數與排程器的併發上限一致
+        self.transport = transport or AiohttpTransport(limit_per_host=self.scheduler.concurrency.maximum)
+        # 已改用 ETag 條件請求，預設不加 _cb 參數，讓中間的快取可以發揮作用
+        self.cache_bust = cache_bust
+        self.parse_workers = parse_workers or cpu_count() or 1
+        self.fast_parse = fast_parse
+        self.search_index = search_index
+        self.site_url = site_url
+        self.base_url = f"{site_url}/tw/word/"
+        self.metrics = metrics or ScrapeMetrics()
+        # 只保留最近的訊息，完整紀錄在 metrics 的事件檔
+        self.log = self.metrics.messages
         self.clear_cache()
         if not exists(self.output_dir):
             makedirs(self.output_dir)
+        self.manifest = FetchManifest(join(self.output_dir, MANIFEST_FILE))
+        self.html_cache = HtmlCache(join(self.output_dir, HTML_CACHE_FILE))
+        self.aliases = AliasMap(join(self.output_dir, ALIAS_FILE))
+        # crawl_depth > 0 時沿著頁面中的單字連結擴展，最多離詞彙 crawl_depth 層、每次執行取出 crawl_budget 個單字
+        self.frontier = (
+            CrawlFrontier(join(self.output_dir, CRAWL_FRONTIER_FILE), join(self.output_dir, LINK_GRAPH_FILE), crawl_depth, crawl_budget)
+            if crawl_depth > 0
+            else None
+        )
+        # 進行中的搜尋，同一個 key 共用一個 Future
+        self.inflight: dict[str, asyncio.Future[Any]] = {}
 
     def clear_cache(self) -> None:
         self.cache_buster = uuid.uuid4().hex
 
     def with_cache_bust(self, url: str) -> str:
+        if not self.cache_bust:
+            return url
         parts = urlsplit(url)
         query_params = dict(parse_qsl(parts.query, keep_blank_values=True))
         query_params["_cb"] = self.cache_buster
         return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query_params, doseq=True), parts.fragment))
 
-    def clean_text(self, text: str) -> str:
+    @classmethod
+    def clean_text(cls, text: str) -> str:
         # 移除文字中的 > 與 #，並處理 HTML 轉義字元
         text = html.unescape(text)
         return text.replace(">", "").replace("#", "")
 
-    def get_segments(self, section: Tag) -> list[tuple[str, str]]:
+    @classmethod
+    def get_segments(cls, section: Tag) -> list[tuple[str, str]]:
         segments: list[tuple[str, str]] = []
         buffer: list[str] = []
 
         def flush():
             text = "".join(buffer).strip()
             if text:
-                segments.append(("normal", self.clean_text(text)))
+                segments.append(("normal", cls.clean_text(text)))
             buffer.clear()
 
         def traverse(node: PageElement):
@@ -60,7 +192,7 @@ class EtymonlineWordScraper:
             if tag_name == "blockquote":
                 flush()  # 遇到 blockquote 前先清空 buffer
                 bq_text = node.get_text(strip=True)
-                segments.append(("blockquote", self.clean_text(bq_text)))
+                segments.append(("blockquote", cls.clean_text(bq_text)))
                 return
             if tag_name == "a":
                 href = node.get("href", "")
@@ -68,7 +200,7 @@ class EtymonlineWordScraper:
                     href = href[0] if href else ""
                 if str(href).startswith("/"):
                     href = "https://www.etymonline.com/tw" + str(href)
-                link_text = self.clean_text(node.get_text(strip=True))
+                link_text = cls.clean_text(node.get_text(strip=True))
                 buffer.append(f"[{link_text}]({href})")
                 return
             for child in node.children:
@@ -82,7 +214,8 @@ class EtymonlineWordScraper:
         flush()
         return segments
 
-    def walk(self, word: str, soup: BeautifulSoup) -> tuple[str, list[tuple[str, str, list[tuple[str, str]]]]]:
+    @classmethod
+    def walk(cls, word: str, soup: BeautifulSoup) -> WordData:
         sections_data: list[tuple[str, str, list[tuple[str, str]]]] = []
         headers = soup.select("h2.scroll-m-16")
         for header in headers:
@@ -95,49 +228,28 @@ class EtymonlineWordScraper:
             section_tag = div_parent.find_next_sibling("section")
             if not section_tag:
                 continue
-            segments = self.get_segments(section_tag)
+            segments = cls.get_segments(section_tag)
             sections_data.append((title, title2, segments))
         return (word, sections_data)
 
-    async def fetch_html(self, session: aiohttp.ClientSession, url: str) -> str:
-        async with session.get(self.with_cache_bust(url)) as response:
-            return await response.text()
-
-    async def process_word(self, session: aiohttp.ClientSession, sem: asyncio.Semaphore, queue: asyncio.Queue[str], word: str) -> None:
-        async with sem:
-            url = f"{self.base_url}{word}"
-            print(f"[{word}] 開始處理單字")
-            self.log.append(f"[{word}] 開始處理單字")
-            html_content = await self.fetch_html(session, url)
-            soup = BeautifulSoup(html_content, "html.parser")
-            h1 = soup.find("h1")
-            if not h1 or (soup.title and soup.title.string and "Page Not Found" in soup.title.string):
-                print(f"[{word}] 抓不到單字頁面，轉向搜尋...")
-                self.log.append(f"[{word}] 抓不到單字頁面，轉向搜尋...")
-                search_url = f"https://www.etymonline.com/search?q={word}"
-                search_html = await self.fetch_html(session, search_url)
-                search_soup = BeautifulSoup(search_html, "html.parser")
-                result_link = search_soup.select_one("a.w-full.group[href*='/word/']")
-                if not result_link:
-                    print(f"[{word}] 搜尋結果：找不到任何相關單字")
-                    self.log.append(f"[{word}] 搜尋結果：找不到任何相關單字")
-                    return
-                first_href = str(result_link.get("href", ""))
-                stem_word = first_href.split("/word/")[-1].split("?")[0].split("#")[0]
-                if stem_word.lower() != word.lower() and stem_word not in self.words:
-                    self.words.append(stem_word)
-                    print(f"[{word}] 搜尋結果：找到相關單字 [{stem_word}]，已加入處理隊列")
-                    self.log.append(f"[{word}] 搜尋結果：找到相關單字 [{stem_word}]，已加入處理隊列")
-                    queue.put_nowait(stem_word)
-                return
-            word_data = self.walk(word, soup)
-            if word_data[1]:
-                self.save_to_markdown(word, word_data)
-            else:
-                print(f"[{word}] 無內容可儲存")
-                self.log.append(f"[{word}] 無內容可儲存")
+    async def fetch_html(self, url: str) -> str:
+        _, text, _ = await self.scheduler.fetch(self.transport, self.with_cache_bust(url))
+        self.metrics.incr("bytes", len(text.encode("utf-8")))
+        return text
+
+    async def fetch_page(self, url: str, headers: dict[str, str]) -> tuple[int, str, dict[str, str]]:
+        status, text, response_headers = await self.scheduler.fetch(self.transport, self.with_cache_bust(url), headers)
+        self.metrics.incr("bytes", len(text.encode("utf-8")))
+        if status == 404:
+            self.metrics.incr("http_404")
+        validators = {k: v for k, v in (("etag", response_headers.get("ETag")), ("last_modified", response_headers.get("Last-Modified"))) if v}
+        return (status, text, validators)
 
-    def save_to_markdown(self, word: str, data: tuple[str, list[tuple[str, str, list[tuple[str, str]]]]]) -> None:
+    def md_path(self, word: str) -> str:
+        return join(self.output_dir, f"{word}.md")
+
+    @classmethod
+    def render_markdown(cls, data: WordData) -> str:
         result = [f"# {data[0]}\n"]
         for title, title2, segments in data[1]:
             result.append(f"## {title} {title2}\n")
@@ -150,83 +262,440 @@ class EtymonlineWordScraper:
                             result.append(f"{c.strip()}  \n")
                     result.append("\n")
             result.append("\n---\n")
-        result = "".join(result).replace("))", ")）").replace("\n\n---", "\n---")
-        file_path = join(self.output_dir, f"{word}.md")
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(result)
-        print(f"[{word}] 存檔完成: {file_path}")
-        self.log.append(f"[{word}] 存檔完成: {file_path}")
+        return "".join(result).replace("))", ")）").replace("\n\n---", "\n---")
+
+    def known_hash(self, word: str) -> str | None:
+        return (self.manifest.get(word) or {}).get("hash")
+
+    def save_to_markdown(self, word: str, data: WordData) -> str:
+        """同步寫檔 (rebuild 使用)；內容與現有檔案相同時不寫入"""
+        result = self.render_markdown(data)
+        changed, _ = write_file(self.md_path(word), result, self.known_hash(word))
+        self.after_write(word, result, changed)
+        if changed:
+            self.index_archive(word, result)
+        return result
+
+    def after_write(self, word: str, content: str, changed: bool) -> None:
+        file_path = self.md_path(word)
+        if not changed:
+            self.metrics.incr("unchanged_files")
+            self.note(word, f"[{word}] 內容未變更，略過寫入: {file_path}")
+            return
+        self.note(word, f"[{word}] 存檔完成: {file_path}")
+
+    def index_archive(self, word: str, content: str) -> None:
+        """更新搜尋索引；抓取管線中在寫檔執行緒執行"""
+        if self.search_index is not None:
+            self.search_index.update(ARCHIVE_SOURCE, word, content, stat(self.md_path(word)).st_mtime)
+
+    def is_current(self, word: str) -> bool:
+        """不需要再抓取：一般執行時存檔與清單一致即可，refresh 時必須是本次 refresh (含中斷前) 已抓取的"""
+        if self.refresh and self.refresh_started is None:
+            return False
+        return self.manifest.is_current(word, self.md_path(word), self.refresh_started)
+
+    def start_refresh(self) -> None:
+        """讀取未完成的 refresh 的開始時間，沒有時以現在開始並記錄"""
+        marker_path = join(self.output_dir, REFRESH_FILE)
+        try:
+            with open(marker_path, "r", encoding="utf-8") as f:
+                self.refresh_started = float(json.load(f)["started"])
+            self.note(None, f"繼續 {time.strftime('%Y-%m-%d %H:%M', time.localtime(self.refresh_started))} 開始的重新抓取")
+            return
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        self.refresh_started = time.time()
+        tmp_path = marker_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"started": self.refresh_started}, f)
+        replace(tmp_path, marker_path)
+
+    def finish_refresh(self) -> None:
+        marker_path = join(self.output_dir, REFRESH_FILE)
+        if exists(marker_path):
+            remove(marker_path)
 
     async def run(self) -> None:
-        sem = asyncio.Semaphore(15)
         queue: asyncio.Queue[str] = asyncio.Queue()
-        processed: set[str] = set()
+        if self.refresh:
+            self.start_refresh()
+        # 爬取模式下已完成的單字記錄在 frontier 的磁碟資料中，不佔用記憶體
+        processed: set[str] | CrawlFrontier = set() if self.frontier is None else self.frontier
+        queued: set[str] = set()
+        skipped = aliased = 0
         for w in self.words:
-            queue.put_nowait(w)
-        async with aiohttp.ClientSession() as session:
-
-            async def worker() -> None:
-                while True:
-                    try:
-                        word = queue.get_nowait()
-                    except asyncio.QueueEmpty:
-                        break
-                    if word not in processed:
+            # 已知的變化形直接改抓對應的頁面，不再經過單字頁 + 搜尋
+            canonical = self.aliases.resolve(w)
+            if canonical != w:
+                aliased += 1
+            if canonical in queued:
+                continue
+            queued.add(canonical)
+            if self.is_current(canonical):
+                processed.add(canonical)
+                self.follow_links(canonical)
+                skipped += 1
+                continue
+            if self.frontier is not None:
+                self.frontier.queue_seed(canonical)
+            queue.put_nowait(canonical)
+        if aliased:
+            self.metrics.incr("alias_hits", aliased)
+            self.note(None, f"已由別名表對應 {aliased} 個變化形")
+        if skipped:
+            self.note(None, f"已略過 {skipped} 個已是最新的單字")
+        try:
+            await self._run_pipeline(queue, processed)
+            # 整次執行完成才刪除；中斷時保留，下次從中斷處繼續
+            if self.refresh:
+                self.finish_refresh()
+        finally:
+            # 中斷 (Ctrl-C) 時也寫回清單，下次從中斷處繼續
+            self.manifest.save()
+            self.aliases.save()
+            if self.frontier is not None:
+                self.frontier.save()
+                self.note(None, self.frontier.summary())
+            self.html_cache.commit()
+            if self.search_index is not None:
+                self.search_index.commit()
+            self.note(None, self.scheduler.summary())
+            self.metrics.gauge("retries", self.scheduler.retries)
+            self.note(None, self.metrics.summary())
+            self.metrics.close()
+
+    def rebuild(self, chunk_size: int = 32) -> None:
+        """不連網，從原始 HTML 快取重新產生所有 Markdown"""
+        words = self.html_cache.words()
+        chunks = [words[i : i + chunk_size] for i in range(0, len(words), chunk_size)]
+        saved = 0
+        with ProcessPoolExecutor(max_workers=self.parse_workers) as pool:
+            futures = [pool.submit(parse_cached, self.html_cache.file_path, chunk, self.fast_parse) for chunk in chunks]
+            for future in futures:
+                for word, word_data in future.result():
+                    if word_data is None or not word_data[1]:
+                        self.note(word, f"[{word}] 無內容可儲存")
+                        continue
+                    with self.metrics.span("write", word):
+                        self.save_to_markdown(word, word_data)
+                    self.manifest.record(word, "saved", hash=file_digest(self.md_path(word)))
+                    saved += 1
+        self.manifest.save()
+        if self.search_index is not None:
+            self.search_index.commit()
+        self.note(None, f"已從快取重建 {saved}/{len(words)} 個單字")
+        self.note(None, self.metrics.summary())
+        self.metrics.close()
+
+    async def _run_pipeline(self, queue: asyncio.Queue[str], processed: set[str] | CrawlFrontier) -> None:
+        """抓取 -> 解析 (子行程) -> 存檔 三段管線，解析不佔用事件迴圈"""
+        loop = asyncio.get_running_loop()
+        parse_queue: asyncio.Queue[tuple[str, str, dict[str, str]]] = asyncio.Queue(maxsize=self.parse_workers * 2)
+        write_queue: asyncio.Queue[tuple[str, WordData, dict[str, str]]] = asyncio.Queue(maxsize=self.parse_workers * 2)
+        pending = queue.qsize()
+        done = 0
+        all_done = asyncio.Event()
+        # 本次執行已開始處理的單字；processed 只在處理成功後才加入，爬取模式中斷或出錯的單字下次會重新抓取
+        started: set[str] = set()
+
+        def finish(word: str | None = None, outcome: str | None = None) -> None:
+            """單字離開管線；結果預設取抓取清單最後記錄的狀態"""
+            nonlocal pending, done
+            pending -= 1
+            if word is not None:
+                done += 1
+                outcome = outcome or (self.manifest.get(word) or {}).get("outcome", "unknown")
+                if outcome != "error":
+                    processed.add(word)
+                elif self.frontier is not None:
+                    self.frontier.retry(word)
+                self.metrics.end_word(word, outcome)
+                self.metrics.gauge("retries", self.scheduler.retries)
+                self.metrics.progress(done, done + pending, force=pending == 0)
+            refill()
+            if pending == 0:
+                all_done.set()
+
+        def enqueue(word: str) -> None:
+            nonlocal pending
+            pending += 1
+            queue.put_nowait(word)
+
+        def refill() -> None:
+            """爬取模式：隊列快空時從 frontier 依優先序取出下一批，已是最新的單字只讀取存檔中的連結"""
+            if self.frontier is None:
+                return
+            batch_size = self.scheduler.concurrency.maximum
+            while queue.qsize() < batch_size:
+                words = self.frontier.pop_batch(batch_size * 2)
+                if not words:
+                    return
+                for word in words:
+                    if self.is_current(word):
                         processed.add(word)
-                        try:
-                            await self.process_word(session, sem, queue, word)
-                        except Exception as e:
-                            print(f"[{word}] 異常: {e}")
-                            self.log.append(f"[{word}] 異常: {e}")
-                    queue.task_done()
-
-            workers = [asyncio.create_task(worker()) for _ in range(15)]
-            await asyncio.gather(*workers)
-
-
-def load_words_from_text(file_path: str, target_list: list[str]) -> None:
-    if not exists(file_path):
-        return
-    with open(file_path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if ":" in line:
-                word = line.split(":", 1)[0].strip()
-                if word and word not in target_list:
-                    target_list.append(word)
-
-
-def load_words_from_txt(file_path: str, target_list: list[str]) -> None:
-    if not exists(file_path):
-        return
-    with open(file_path, "r", encoding="utf-8") as f:
-        words = f.readlines()
+                        self.follow_links(word)
+                    else:
+                        enqueue(word)
+
+        refill()
+        if not pending:
+            return
+        writer = ArchiveWriter()
+
+        async def fetch_worker() -> None:
+            while True:
+                word = await queue.get()
+                if word in started or word in processed:
+                    finish()
+                    continue
+                started.add(word)
+                # 本次執行中才確認的變化形 (如大小寫不同) 也直接改抓對應的頁面
+                canonical = self.aliases.resolve(word)
+                if canonical != word:
+                    processed.add(word)
+                    self.metrics.incr("alias_hits")
+                    enqueue(canonical)
+                    finish()
+                    continue
+                self.metrics.begin_word(word)
+                try:
+                    item = await self.fetch_word(word)
+                except Exception as e:
+                    self.record_error(word, e)
+                    finish(word)
+                    continue
+                if item is None:
+                    self.follow_links(word)
+                    finish(word, "unchanged")
+                else:
+                    await parse_queue.put(item)
+
+        async def parse_worker(pool: ProcessPoolExecutor) -> None:
+            while True:
+                word, html_content, validators = await parse_queue.get()
+                try:
+                    with self.metrics.span("parse", word):
+                        word_data = await loop.run_in_executor(pool, parse_page, word, html_content, self.fast_parse)
+                    if word_data is None:
+                        stem_word = await self.search_fallback(pool, word)
+                        if stem_word is not None:
+                            enqueue(stem_word)
+                        finish(word)
+                        continue
+                    # SQLite 寫入與壓縮在寫檔執行緒中進行
+                    await writer.call(self.html_cache.put, word, html_content)
+                    if not word_data[1]:
+                        self.note(word, f"[{word}] 無內容可儲存")
+                        self.manifest.record(word, "empty")
+                    else:
+                        await write_queue.put((word, word_data, validators))
+                        continue
+                except Exception as e:
+                    self.record_error(word, e)
+                finish(word)
+
+        def on_written(word: str, content: str, validators: dict[str, str], started: float, future: "asyncio.Future[WriteResult]") -> None:
+            try:
+                changed, digest = future.result()
+                self.metrics.observe("write", time.monotonic() - started, word, changed=changed)
+                self.after_write(word, content, changed)
+                self.manifest.record(word, "saved", hash=digest, **validators)
+            except Exception as e:
+                self.record_error(word, e)
+                finish(word)
+                return
+            if changed and self.search_index is not None:
+                # 搜尋索引的 SQLite 寫入同樣在寫檔執行緒中進行
+                writer.call(self.index_archive, word, content).add_done_callback(functools.partial(on_indexed, word))
+            else:
+                finish(word)
+
+        def on_indexed(word: str, future: "asyncio.Future[None]") -> None:
+            error = None if future.cancelled() else future.exception()
+            if isinstance(error, Exception):
+                self.record_error(word, error)
+            finish(word)
+
+        async def write_worker() -> None:
+            # 實際寫檔在 writer 的執行緒中整批進行，這裡只負責產生內容並送出
+            while True:
+                word, word_data, validators = await write_queue.get()
+                try:
+                    content = self.render_markdown(word_data)
+                    self.follow_links(word, content)
+                    started = time.monotonic()
+                    future = await writer.submit(self.md_path(word), content, self.known_hash(word))
+                    future.add_done_callback(functools.partial(on_written, word, content, validators, started))
+                except Exception as e:
+                    self.record_error(word, e)
+                    finish(word)
+
+        with ProcessPoolExecutor(max_workers=self.parse_workers) as pool:
+            # 單字頁面與搜尋共用同一個 transport 的連線池
+            async with self.transport:
+                # 實際併發由排程器控制，worker 數只需不少於併發上限
+                tasks = [asyncio.create_task(fetch_worker()) for _ in range(self.scheduler.concurrency.maximum)]
+                tasks += [asyncio.create_task(parse_worker(pool)) for _ in range(self.parse_workers)]
+                tasks.append(asyncio.create_task(write_worker()))
+                try:
+                    await all_done.wait()
+                finally:
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                    # 中斷時也等已送出的寫入完成
+                    await writer.close()
+
+    async def fetch_word(self, word: str) -> tuple[str, str, dict[str, str]] | None:
+        """抓取單字頁面，頁面未變更時回傳 None"""
+        url = f"{self.base_url}{word}"
+        self.note(word, f"[{word}] 開始處理單字")
+        headers = self.manifest.conditional_headers(word) if exists(self.md_path(word)) else {}
+        with self.metrics.span("fetch", word):
+            status, html_content, validators = await self.fetch_page(url, headers)
+        if status == 304:
+            self.note(word, f"[{word}] 頁面未變更，略過")
+            self.manifest.record(word, "saved", **validators)
+            return None
+        return (word, html_content, validators)
+
+    async def search_fallback(self, pool: ProcessPoolExecutor, word: str) -> str | None:
+        """單字頁面不存在時改用搜尋，回傳需要加入隊列的相關單字"""
+        self.note(word, f"[{word}] 抓不到單字頁面，轉向搜尋...")
+        self.metrics.incr("fallbacks")
+        with self.metrics.span("search", word):
+            stem_word = await self.coalesce(f"search:{normalize_alias(word)}", lambda: self.search_stem(pool, word))
+        if stem_word is None:
+            self.note(word, f"[{word}] 搜尋結果：找不到任何相關單字")
+            self.manifest.record(word, "not_found")
+            return None
+        self.manifest.record(word, "redirect", stem=stem_word)
+        self.aliases.add(word, stem_word)
+        if stem_word.lower() != word.lower() and stem_word not in self.known_words:
+            self.words.append(stem_word)
+            self.known_words.add(stem_word)
+            self.note(word, f"[{word}] 搜尋結果：找到相關單字 [{stem_word}]，已加入處理隊列")
+            return stem_word
+        return None
+
+    def follow_links(self, word: str, markdown: str | None = None) -> None:
+        """爬取模式：記錄頁面中的單字連結，沒有給內容時讀取存檔 (已記錄過連結的略過)"""
+        if self.frontier is None:
+            return
+        if markdown is None:
+            md_path = self.md_path(word)
+            if self.frontier.graph.has_links(word) or not exists(md_path):
+                return
+            with open(md_path, "r", encoding="utf-8") as f:
+                markdown = f.read()
+        self.metrics.incr("discovered", self.frontier.record_links(word, markdown))
+
+    async def search_stem(self, pool: ProcessPoolExecutor, word: str) -> str | None:
+        canonical = self.aliases.get(word)
+        if canonical is not None:
+            return canonical
+        search_html = await self.fetch_html(f"{self.site_url}/search?q={normalize_alias(word)}")
+        return await asyncio.get_running_loop().run_in_executor(pool, parse_search_result, search_html)
+
+    async def coalesce(self, key: str, make: Callable[[], Awaitable[Any]]) -> Any:
+        """同一個 key 已有請求進行中時等待同一個結果，不重複發出請求"""
+        future = self.inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(make())
+            self.inflight[key] = future
+            future.add_done_callback(lambda _: self.inflight.pop(key, None))
+        else:
+            self.metrics.incr("coalesced")
+        # shield：其中一個等待者被取消時不影響其他等待者
+        return await asyncio.shield(future)
+
+    def note(self, word: str | None, text: str) -> None:
+        self.metrics.message(word, text)
+
+    def record_error(self, word: str, e: Exception) -> None:
+        self.metrics.incr("exceptions")
+        self.note(word, f"[{word}] 異常: {e}")
+        self.manifest.record(word, "error", error=str(e))
+
+
+def parse_page(word: str, html_content: str, fast_parse: bool = False) -> WordData | None:
+    """在子行程中解析單字頁面，頁面不存在時回傳 None；fast_parse 時改用串流擷取，不建立 bs4 樹"""
+    if fast_parse:
+        return page_extractor.extract(word, html_content, EtymonlineWordScraper.clean_text)
+    soup = BeautifulSoup(html_content, "html.parser")
+    h1 = soup.find("h1")
+    if not h1 or (soup.title and soup.title.string and "Page Not Found" in soup.title.string):
+        return None
+    return EtymonlineWordScraper.walk(word, soup)
+
+
+def parse_cached(cache_path: str, words: list[str], fast_parse: bool) -> list[tuple[str, WordData | None]]:
+    """在子行程中直接讀取快取並解析，避免在主行程解壓縮整個快取"""
+    cache = HtmlCache(cache_path)
+    try:
+        results: list[tuple[str, WordData | None]] = []
         for word in words:
-            word = word.strip()
-            if word and "*" not in word and word not in target_list:
-                target_list.append(word)
+            html_content = cache.get(word)
+            results.append((word, None if html_content is None else parse_page(word, html_content, fast_parse)))
+        return results
+    finally:
+        cache.close()
+
+
+def parse_search_result(search_html: str) -> str | None:
+    search_soup = BeautifulSoup(search_html, "html.parser")
+    result_link = search_soup.select_one("a.w-full.group[href*='/word/']")
+    if not result_link:
+        return None
+    first_href = str(result_link.get("href", ""))
+    return first_href.split("/word/")[-1].split("?")[0].split("#")[0]
 
 
 test: bool = False
 re_get_all: bool = False
+# 串流擷取 (page_extractor)；切換前先以 python -m benchmarks.extractor <存檔目錄>/.html_cache.sqlite 確認與 bs4 及現有存檔一致
+fast_parse: bool = False
+# 只用已快取的原始 HTML 重新產生 etymology_archive，不連網
+rebuild: bool = False
 base_path: str = "C:/Users/joey2/桌面/英文/"
+# 每個單字各階段耗時與計數的 JSONL 事件紀錄
+events_file: str = "etymology_scraping_events.jsonl"
+# 大於 0 時沿著頁面中的辭源連結擴展抓取範圍 (離詞彙最多幾層)，每次執行最多取出 crawl_budget 個新單字
+crawl_depth: int = 0
+crawl_budget: int = 5000
 target_list: list[str] = []
 
 if __name__ == "__main__":
     if test:
-        scraper = EtymonlineWordScraper(["achieve", "rule", "apply"])
+        scraper = EtymonlineWordScraper(["achieve", "rule", "apply"], fast_parse=fast_parse, metrics=ScrapeMetrics(events_file))
     else:
         if re_get_all:
-            for f_name in ["words.txt", "affix.txt"]:
-                load_words_from_text(join(base_path, f_name), target_list)
-            for f_name in listdir(join(base_path, "etymology_archive")):
-                word = f_name.split(".")[0]
-                if word and word not in target_list:
-                    target_list.append(word)
+            target_list = unique(
+                iter_defined_words(join(base_path, "words.txt")),
+                iter_defined_words(join(base_path, "affix.txt")),
+                (word for word in (f_name.split(".")[0] for f_name in listdir(join(base_path, "etymology_archive"))) if word),
+            )
         else:
-            load_words_from_txt(join(base_path, "new.txt"), target_list)
-        scraper = EtymonlineWordScraper(target_list, join(base_path, "etymology_archive"))
+            target_list = unique(iter_listed_words(join(base_path, "new.txt")))
+        scraper = EtymonlineWordScraper(
+            target_list,
+            join(base_path, "etymology_archive"),
+            refresh=re_get_all,
+            fast_parse=fast_parse,
+            search_index=SearchIndex(join(base_path, DEFAULT_INDEX_FILE)),
+            metrics=ScrapeMetrics(events_file),
+            crawl_depth=crawl_depth,
+            crawl_budget=crawl_budget,
+        )
 
-    asyncio.run(scraper.run())
-    with open("etymology_scraping_log.txt", "w", encoding="utf-8") as log_file:
-        log_file.write("\n".join(scraper.log))
+    try:
+        if rebuild:
+            scraper.rebuild()
+        else:
+            asyncio.run(scraper.run())
+    except KeyboardInterrupt:
+        print("已中斷，進度已寫入抓取清單，下次執行將從中斷處繼續")
+    finally:
+        with open("etymology_scraping_log.txt", "w", encoding="utf-8") as log_file:
+            log_file.write("\n".join(scraper.log))
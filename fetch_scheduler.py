@@ -0,0 +1,140 @@
+import asyncio, random, time
+from typing import Mapping
+from transport import Response, Transport, TransportError
+
+# 需要重試的 HTTP 狀態碼
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class FetchFailed(Exception):
+    """重試次數用盡仍無法取得回應"""
+
+
+class TokenBucket:
+    """令牌桶限速：每秒補充 rate 個令牌，最多累積 capacity 個"""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AdaptiveConcurrency:
+    """AIMD 併發控制：延遲穩定時每個窗口加 1，出錯時減半"""
+
+    def __init__(self, initial: int, minimum: int, maximum: int, tolerance: float = 2.0) -> None:
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.tolerance = tolerance
+        self.in_flight = 0
+        self.baseline: float | None = None
+        self.condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self) -> None:
+        async with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def on_success(self, latency: float) -> None:
+        if self.baseline is None:
+            self.baseline = latency
+        else:
+            self.baseline = min(latency, self.baseline * 0.95 + latency * 0.05)
+        if latency <= self.baseline * self.tolerance:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        else:
+            self.limit = max(self.minimum, self.limit - 1 / self.limit)
+
+    def on_failure(self) -> None:
+        self.limit = max(self.minimum, self.limit / 2)
+
+
+class FetchScheduler:
+    """取代固定 Semaphore 的抓取排程：限速、逾時、指數退避重試與自適應併發"""
+
+    def __init__(
+        self,
+        rate: float = 10,
+        burst: int = 20,
+        timeout: float = 20,
+        max_retries: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 30,
+        initial_concurrency: int = 15,
+        min_concurrency: int = 2,
+        max_concurrency: int = 30,
+    ) -> None:
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = AdaptiveConcurrency(initial_concurrency, min_concurrency, max_concurrency)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.retries = 0
+        self.started = time.monotonic()
+
+    def backoff(self, attempt: int, retry_after: str | None = None) -> float:
+        if retry_after and retry_after.isdigit():
+            return min(self.max_delay, float(retry_after))
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    async def fetch(self, transport: Transport, url: str, headers: Mapping[str, str] | None = None) -> Response:
+        """回傳 (狀態碼, 內容, 回應標頭)，304 時內容為空字串；標頭不分大小寫"""
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            await self.concurrency.acquire()
+            self.requests += 1
+            start = time.monotonic()
+            retry_after: str | None = None
+            try:
+                status, text, response_headers = await transport.get(url, headers, self.timeout)
+                if status not in RETRY_STATUSES:
+                    self.concurrency.on_success(time.monotonic() - start)
+                    self.successes += 1
+                    return (status, text, response_headers)
+                retry_after = response_headers.get("Retry-After")
+                error = f"HTTP {status}"
+            except TransportError as e:
+                error = str(e)
+            except asyncio.TimeoutError as e:
+                error = f"{type(e).__name__}: {e}"
+            finally:
+                await self.concurrency.release()
+            self.concurrency.on_failure()
+            if attempt < self.max_retries:
+                self.retries += 1
+                await asyncio.sleep(self.backoff(attempt, retry_after))
+        self.failures += 1
+        raise FetchFailed(f"{url} 重試 {self.max_retries} 次後失敗 ({error})")
+
+    def summary(self) -> str:
+        elapsed = time.monotonic() - self.started
+        done = self.successes + self.failures
+        rate = self.successes / done * 100 if done else 0.0
+        throughput = self.requests / elapsed if elapsed else 0.0
+        return (
+            f"請求 {self.requests} 次 (重試 {self.retries} 次)，成功率 {rate:.1f}% ({self.successes}/{done})，"
+            f"吞吐量 {throughput:.2f} 請求/秒，最終併發上限 {int(self.concurrency.limit)}"
+        )
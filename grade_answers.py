@@ -0,0 +1,86 @@
+"""批次批改答案檔
+
+輸入為 tab 分隔的文字檔，每行最後兩欄為「單字」與「答案」，前面的欄位 (如學號) 原樣保留。
+相同的 (單字, 答案) 只批改一次；完全相符或相似度高的直接算對，相似度低的直接算錯，
+只有中間區間需要人工確認 (--confirm)，否則標記為 ?。
+"""
+
+import sys, argparse
+from answer_index import AnswerIndex, normalize_answer
+from vocabulary import iter_entries
+from quiz_constants import AFFIRMATIVE_RESPONSES, NEGATIVE_RESPONSES, SKIP_ANSWERS, DEFAULT_VOCABULARY_FILE
+
+RESULT_TEXT = {True: "✓", False: "✗", None: "?"}
+
+
+def read_answers(file_path: str) -> list[tuple[list[str], str, str]]:
+    rows: list[tuple[list[str], str, str]] = []
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            columns = line.rstrip("\r\n").split("\t")
+            if len(columns) < 2 or not columns[-2].strip():
+                continue
+            rows.append((columns[:-2], columns[-2].strip(), columns[-1]))
+    return rows
+
+
+def confirm(word: str, answer: str, correct_answer: str) -> bool:
+    print(f"\n'{word}'", file=sys.stderr)
+    print(f"答案：{answer}", file=sys.stderr)
+    print(f"正確答案：{correct_answer}", file=sys.stderr)
+    while True:
+        response = input("答案是否正確？ [Y/N]: ").strip().lower()
+        if response in AFFIRMATIVE_RESPONSES:
+            return True
+        elif response in NEGATIVE_RESPONSES:
+            return False
+        print("請輸入 'Y' 或 'N'。", file=sys.stderr)
+
+
+def grade_all(
+    rows: list[tuple[list[str], str, str]], vocabulary: dict[str, str], answers: AnswerIndex, interactive: bool = False
+) -> list[tuple[bool | None, float]]:
+    """先對不重複的 (單字, 標準化答案) 批改，再展開回每一行"""
+    graded: dict[tuple[str, str], tuple[bool | None, float]] = {}
+    # 每組 (單字, 標準化答案) 第一次出現時的原始答案，確認時顯示用戶實際輸入的內容
+    raw_answers: dict[tuple[str, str], str] = {}
+    for _, word, answer in rows:
+        key = (word, normalize_answer(answer))
+        if key in graded:
+            continue
+        raw_answers[key] = answer
+        if word not in vocabulary or answer.lower().strip() in SKIP_ANSWERS:
+            graded[key] = (None if word not in vocabulary else False, 0.0)
+            continue
+        graded[key] = answers.grade(word, answer)
+    if interactive:
+        for key, (result, score) in graded.items():
+            word = key[0]
+            if result is None and word in vocabulary:
+                graded[key] = (confirm(word, raw_answers[key], vocabulary[word]), score)
+    return [graded[(word, normalize_answer(answer))] for _, word, answer in rows]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="批次批改 (單字, 答案) 檔案")
+    parser.add_argument("answers", help="tab 分隔的答案檔")
+    parser.add_argument("--vocabulary", default=DEFAULT_VOCABULARY_FILE)
+    parser.add_argument("--output", help="輸出檔，預設為標準輸出")
+    parser.add_argument("--confirm", action="store_true", help="逐一詢問落在模糊區間的答案")
+    args = parser.parse_args()
+
+    vocabulary = dict(iter_entries(args.vocabulary))
+    answer_index = AnswerIndex.load(args.vocabulary, vocabulary)
+    rows = read_answers(args.answers)
+    results = grade_all(rows, vocabulary, answer_index, args.confirm)
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for (columns, word, answer), (result, score) in zip(rows, results):
+            output.write("\t".join(columns + [word, answer, RESULT_TEXT[result], f"{score:.2f}"]) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    unknown = sum(1 for _, word, _ in rows if word not in vocabulary)
+    counts = {value: sum(1 for result, _ in results if result is value) for value in (True, False, None)}
+    print(f"共 {len(rows)} 題：正確 {counts[True]}、錯誤 {counts[False]}、待確認 {counts[None] - unknown}、不在詞彙中 {unknown}", file=sys.stderr)
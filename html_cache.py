@@ -0,0 +1,54 @@
+import sqlite3, zlib, hashlib, time
+from typing import Iterator
+
+
+class HtmlCache:
+    """以內容雜湊為鍵、zlib 壓縮儲存原始 HTML 的 SQLite 快取"""
+
+    def __init__(self, file_path: str, commit_every: int = 50) -> None:
+        self.file_path = file_path
+        self.commit_every = commit_every
+        self.uncommitted = 0
+        # 抓取管線中由 ArchiveWriter 的執行緒寫入，存取由該執行緒依序進行
+        self.conn = sqlite3.connect(file_path, check_same_thread=False)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS blobs (hash TEXT PRIMARY KEY, data BLOB NOT NULL);
+            CREATE TABLE IF NOT EXISTS pages (word TEXT PRIMARY KEY, hash TEXT NOT NULL, fetched_at REAL NOT NULL);
+            """
+        )
+
+    def put(self, word: str, html_content: str) -> str:
+        raw = html_content.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        self.conn.execute("INSERT OR IGNORE INTO blobs (hash, data) VALUES (?, ?)", (digest, zlib.compress(raw, 6)))
+        self.conn.execute("INSERT OR REPLACE INTO pages (word, hash, fetched_at) VALUES (?, ?, ?)", (word, digest, time.time()))
+        self.uncommitted += 1
+        if self.uncommitted >= self.commit_every:
+            self.commit()
+        return digest
+
+    def get(self, word: str) -> str | None:
+        row = self.conn.execute("SELECT b.data FROM pages p JOIN blobs b ON b.hash = p.hash WHERE p.word = ?", (word,)).fetchone()
+        return zlib.decompress(row[0]).decode("utf-8") if row else None
+
+    def words(self) -> list[str]:
+        return [row[0] for row in self.conn.execute("SELECT word FROM pages ORDER BY word")]
+
+    def items(self) -> Iterator[tuple[str, str]]:
+        for word, data in self.conn.execute("SELECT p.word, b.data FROM pages p JOIN blobs b ON b.hash = p.hash ORDER BY p.word"):
+            yield (word, zlib.decompress(data).decode("utf-8"))
+
+    def prune(self) -> int:
+        """刪除已無任何單字引用的內容"""
+        cursor = self.conn.execute("DELETE FROM blobs WHERE hash NOT IN (SELECT hash FROM pages)")
+        self.commit()
+        return cursor.rowcount
+
+    def commit(self) -> None:
+        self.conn.commit()
+        self.uncommitted = 0
+
+    def close(self) -> None:
+        self.commit()
+        self.conn.close()
@@ -0,0 +1,285 @@
+import re, html
+from html.entities import html5
+from html.parser import HTMLParser
+from typing import Callable
+
+# 與 bs4 (html.parser) 建樹規則一致的設定
+VOID_TAGS = frozenset(
+    ("area", "base", "basefont", "bgsound", "br", "col", "command", "embed", "frame", "hr", "image", "img")
+    + ("input", "isindex", "keygen", "link", "menuitem", "meta", "nextid", "param", "source", "spacer", "track", "wbr")
+)
+PRESERVE_WHITESPACE_TAGS = frozenset(("pre", "textarea"))
+# 這些標籤內的文字在 bs4 中屬於特殊字串類別，不計入 get_text()
+STRING_CONTAINER_TAGS = frozenset(("rt", "rp", "style", "script", "template"))
+ASCII_SPACES = " \n\t\x0c\r"
+FLUSH_TAGS = ("p", "div", "br", "section")
+LINK_PREFIX = "https://www.etymonline.com/tw"
+
+
+class Element:
+    __slots__ = ("name", "classes", "attrs")
+
+    def __init__(self, name: str, attrs: dict[str, str]) -> None:
+        self.name = name
+        self.attrs = attrs
+        self.classes = attrs.get("class", "").split()
+
+
+class TextCapture:
+    """模擬 Tag.get_text(strip=True)：收集元素內的一般文字"""
+
+    def __init__(self, root: Element) -> None:
+        self.root = root
+        self.parts: list[str] = []
+
+    def text(self, data: str, is_text: bool) -> None:
+        if is_text:
+            data = data.strip()
+            if data:
+                self.parts.append(data)
+
+    def result(self) -> str:
+        return "".join(self.parts)
+
+
+class SectionCapture:
+    """模擬 EtymonlineWordScraper.get_segments 對 <section> 的走訪"""
+
+    def __init__(self, root: Element, indices: list[int], clean_text: Callable[[str], str]) -> None:
+        self.root = root
+        self.indices = indices
+        self.clean_text = clean_text
+        self.segments: list[tuple[str, str]] = []
+        self.buffer: list[str] = []
+        # 進入 button/ad-space/blockquote/a 時，直到該元素結束前都由 special 接管
+        self.special: Element | None = None
+        self.special_kind = ""
+        self.special_text: TextCapture | None = None
+
+    def flush(self) -> None:
+        text = "".join(self.buffer).strip()
+        if text:
+            self.segments.append(("normal", self.clean_text(text)))
+        self.buffer.clear()
+
+    def start(self, element: Element) -> None:
+        if self.special is not None:
+            return
+        if element.name == "button" or "ad-space" in element.classes:
+            self.special, self.special_kind = element, "skip"
+        elif element.name == "blockquote":
+            self.flush()
+            self.special, self.special_kind, self.special_text = element, "blockquote", TextCapture(element)
+        elif element.name == "a":
+            self.special, self.special_kind, self.special_text = element, "a", TextCapture(element)
+
+    def text(self, data: str, is_text: bool) -> None:
+        if self.special is None:
+            self.buffer.append(data)
+        elif self.special_text is not None:
+            self.special_text.text(data, is_text)
+
+    def end(self, element: Element) -> None:
+        if self.special is not None:
+            if element is not self.special:
+                return
+            if self.special_kind == "blockquote" and self.special_text is not None:
+                self.segments.append(("blockquote", self.clean_text(self.special_text.result())))
+            elif self.special_kind == "a" and self.special_text is not None:
+                href = element.attrs.get("href", "")
+                if href.startswith("/"):
+                    href = LINK_PREFIX + href
+                self.buffer.append(f"[{self.clean_text(self.special_text.result())}]({href})")
+            self.special, self.special_kind, self.special_text = None, "", None
+            return
+        if element.name in FLUSH_TAGS:
+            self.flush()
+
+
+class StreamingExtractor(HTMLParser):
+    """不建立完整 bs4 樹，只在串流中擷取 h2.scroll-m-16 標題與其後的 <section>
+
+    輸出與 EtymonlineWordScraper.walk 相同的資料結構。
+    """
+
+    def __init__(self, clean_text: Callable[[str], str]) -> None:
+        super().__init__(convert_charrefs=False)
+        self.clean_text = clean_text
+        self.root = Element("[document]", {})
+        self.stack: list[Element] = [self.root]
+        self.pending_data: list[str] = []
+        self.already_closed: list[str] = []
+        self.container_depth = 0
+        self.preserve_depth = 0
+        self.has_h1 = False
+        self.title: Element | None = None
+        self.title_children: list[str | None] = []
+        self.headers: list[tuple[str, str] | None] = []
+        self.header_captures: list[tuple[int, TextCapture]] = []
+        self.header_divs: dict[int, list[int]] = {}
+        # 已關閉的 div 的父元素 -> 等待其後 <section> 的標題編號
+        self.waiting: dict[int, list[int]] = {}
+        self.section_captures: list[SectionCapture] = []
+        self.sections: dict[int, list[tuple[str, str]]] = {}
+
+    def end_data(self, is_text: bool = True) -> None:
+        if not self.pending_data:
+            return
+        data = "".join(self.pending_data)
+        self.pending_data = []
+        if not self.preserve_depth and not data.strip(ASCII_SPACES):
+            data = "\n" if "\n" in data else " "
+        is_text = is_text and not self.container_depth
+        self.add_string(data, is_text)
+
+    def add_string(self, data: str, is_text: bool) -> None:
+        if self.title is not None and self.stack[-1] is self.title:
+            self.title_children.append(data)
+        for _, capture in self.header_captures:
+            capture.text(data, is_text)
+        for section in self.section_captures:
+            section.text(data, is_text)
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self.start(tag, attrs)
+        if tag in VOID_TAGS:
+            # bs4 會立即關閉空元素，並忽略之後多餘的 </tag>
+            self.end(tag)
+            self.already_closed.append(tag)
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self.start(tag, attrs)
+        self.end(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in self.already_closed:
+            self.already_closed.remove(tag)
+        else:
+            self.end(tag)
+
+    def start(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self.end_data()
+        element = Element(tag, {k: "" if v is None else v for k, v in attrs})
+        parent = self.stack[-1]
+        if self.title is not None and parent is self.title:
+            self.title_children.append(None)
+        if tag == "h1":
+            self.has_h1 = True
+        elif tag == "title" and self.title is None:
+            self.title = element
+        elif tag == "h2" and "scroll-m-16" in element.classes:
+            index = len(self.headers)
+            self.headers.append(None)
+            self.header_captures.append((index, TextCapture(element)))
+            div = next((e for e in reversed(self.stack) if e.name == "div"), None)
+            if div is not None:
+                self.header_divs.setdefault(id(div), []).append(index)
+        elif tag == "section" and id(parent) in self.waiting:
+            self.section_captures.append(SectionCapture(element, self.waiting.pop(id(parent)), self.clean_text))
+        for section in self.section_captures:
+            if section.root is not element:
+                section.start(element)
+        self.stack.append(element)
+        if tag in STRING_CONTAINER_TAGS:
+            self.container_depth += 1
+        if tag in PRESERVE_WHITESPACE_TAGS:
+            self.preserve_depth += 1
+
+    def end(self, tag: str) -> None:
+        self.end_data()
+        for i in range(len(self.stack) - 1, 0, -1):
+            if self.stack[i].name == tag:
+                while len(self.stack) > i:
+                    self.pop()
+                return
+
+    def pop(self) -> None:
+        element = self.stack.pop()
+        if element.name in STRING_CONTAINER_TAGS:
+            self.container_depth -= 1
+        if element.name in PRESERVE_WHITESPACE_TAGS:
+            self.preserve_depth -= 1
+        for section in list(self.section_captures):
+            if section.root is element:
+                section.flush()
+                self.section_captures.remove(section)
+                for index in section.indices:
+                    self.sections[index] = section.segments
+            else:
+                section.end(element)
+        for index, capture in list(self.header_captures):
+            if capture.root is element:
+                header_text = capture.result()
+                match = re.match(r"^(.+?)\s*(\(.*\))$", header_text)
+                self.headers[index] = match.groups() if match else (header_text, "")  # type: ignore[assignment]
+                self.header_captures.remove((index, capture))
+        self.waiting.pop(id(element), None)
+        indices = self.header_divs.pop(id(element), None)
+        if indices:
+            self.waiting.setdefault(id(self.stack[-1]), []).extend(indices)
+
+    def handle_data(self, data: str) -> None:
+        self.pending_data.append(data)
+
+    def handle_charref(self, name: str) -> None:
+        self.pending_data.append(html.unescape(f"&#{name};"))
+
+    def handle_entityref(self, name: str) -> None:
+        self.pending_data.append(html5.get(f"{name};", f"&{name}"))
+
+    def handle_comment(self, data: str) -> None:
+        self.end_data()
+        self.pending_data.append(data)
+        self.end_data(is_text=False)
+
+    def handle_decl(self, decl: str) -> None:
+        self.end_data()
+        self.pending_data.append(decl[len("DOCTYPE ") :])
+        self.end_data(is_text=False)
+
+    def handle_pi(self, data: str) -> None:
+        self.end_data()
+        self.pending_data.append(data)
+        self.end_data(is_text=False)
+
+    def unknown_decl(self, data: str) -> None:
+        self.end_data()
+        if data.upper().startswith("CDATA["):
+            self.pending_data.append(data[len("CDATA[") :])
+            self.end_data()
+        else:
+            self.pending_data.append(data)
+            self.end_data(is_text=False)
+
+    def close(self) -> None:
+        super().close()
+        self.end_data()
+        while len(self.stack) > 1:
+            self.pop()
+
+    def page_found(self) -> bool:
+        if not self.has_h1:
+            return False
+        if self.title is not None and len(self.title_children) == 1:
+            # 對應 soup.title.string：title 只有單一字串子節點時才有值
+            title_string = self.title_children[0]
+            if title_string is not None and "Page Not Found" in title_string:
+                return False
+        return True
+
+    def sections_data(self) -> list[tuple[str, str, list[tuple[str, str]]]]:
+        result: list[tuple[str, str, list[tuple[str, str]]]] = []
+        for index, header in enumerate(self.headers):
+            if header is not None and index in self.sections:
+                result.append((header[0], header[1], self.sections[index]))
+        return result
+
+
+def extract(word: str, html_content: str, clean_text: Callable[[str], str]) -> tuple[str, list[tuple[str, str, list[tuple[str, str]]]]] | None:
+    """快速擷取單字頁面，頁面不存在時回傳 None"""
+    parser = StreamingExtractor(clean_text)
+    parser.feed(html_content)
+    parser.close()
+    if not parser.page_found():
+        return None
+    return (word, parser.sections_data())
@@ -0,0 +1,10 @@
+"""測驗程式共用的常量
+
+test.py 與 Python 標準函式庫的 test 套件同名，其他模組從這裡匯入，避免取到錯誤的模組。
+"""
+
+DEFAULT_VOCABULARY_FILE = "words.txt"
+LOG_FILE = "log.json"
+AFFIRMATIVE_RESPONSES = ("y", "yes", "是", "对", "對", "1")
+NEGATIVE_RESPONSES = ("n", "no", "否", "错", "錯", "0")
+SKIP_ANSWERS = ("n", "x", "", " ")
@@ -0,0 +1,271 @@
+"""多人同時使用的詞彙測驗伺服器
+
+用法：python quiz_server.py [--host 127.0.0.1] [--port 8080] [--vocabulary words.txt] [--data-dir quiz_users]
+詞彙與答案變體只載入一次由所有使用者共用；每位使用者的 log.json 與 review.json 放在 <data-dir>/<使用者>/，
+答題結果先更新記憶體，每 flush_interval 秒把有變動的使用者整批寫回 (同一使用者多次答題只寫一次)。
+
+HTTP：
+    GET  /api/<使用者>/words?count=10          → {"words": [...]}
+    POST /api/<使用者>/answers {"answers": [[單字, 答案], ...]}
+                                               → {"results": [{"word", "result": true/false/null, "score", "answer"}]}
+    POST /api/<使用者>/confirm {"results": [[單字, true/false], ...]}   null (需人工確認) 的題目由用戶確認後送回
+WebSocket /ws/<使用者>：送出 {"type": "words" | "answers" | "confirm", ...}，回覆同名 type 與上面相同的內容。
+"""
+
+import re, json, asyncio, argparse
+from os import makedirs
+from os.path import exists, join
+from typing import Any, Iterable
+from aiohttp import WSMsgType, web
+from answer_index import AnswerIndex
+from review_journal import write_snapshot
+from review_scheduler import ReviewScheduler
+from quiz_constants import DEFAULT_VOCABULARY_FILE, LOG_FILE, SKIP_ANSWERS
+from vocabulary import iter_entries
+from word_sampler import WordSampler
+
+DEFAULT_DATA_DIR = "quiz_users"
+USER_RE = re.compile(r"^[A-Za-z0-9_-]{1,32}$")
+MAX_COUNT = 100
+
+
+class UserState:
+    """單一使用者的答題次數、抽題權重與複習排程"""
+
+    def __init__(self, directory: str, log: dict[str, int], sampler: WordSampler, scheduler: ReviewScheduler) -> None:
+        self.directory = directory
+        self.log = log
+        self.sampler = sampler
+        self.scheduler = scheduler
+
+    @classmethod
+    def load(cls, directory: str, words: list[str], position: dict[str, int], vocabulary: set[str]) -> "UserState":
+        """words、position 與 vocabulary 由所有使用者共用，使用者只另外持有自己的記錄與權重"""
+        log: dict[str, int] = {}
+        log_file = join(directory, LOG_FILE)
+        if exists(log_file):
+            with open(log_file, "r", encoding="utf-8") as f:
+                log = json.load(f)
+        scheduler = ReviewScheduler.load(vocabulary, log, join(directory, "review.json"))
+        return cls(directory, log, WordSampler(words, log, position), scheduler)
+
+    def choose_words(self, count: int) -> list[str]:
+        """與 VocabularyTester.choose_words 相同：先取到期的單字，不足的依準確率加權抽取"""
+        selected = self.scheduler.due_words(count)
+        if len(selected) < count:
+            due = set(selected)
+            extra = [word for word in self.sampler.sample(count) if word not in due]
+            selected += extra[: count - len(selected)]
+        return selected
+
+    def record(self, results: Iterable[tuple[str, bool]]) -> None:
+        for word, correct in results:
+            self.log[word] = self.log.get(word, 0) + (1 if correct else -1)
+            self.sampler.set_accuracy(word, self.log[word])
+            self.scheduler.review(word, correct)
+
+    def snapshot(self) -> tuple[str, str]:
+        """在事件迴圈中序列化 (避免寫檔執行緒讀到正在修改的 dict)，回傳 (log, review) 的 JSON"""
+        log = dict(sorted(((k, v) for k, v in self.log.items() if v != 0), key=lambda item: (-item[1], item[0])))
+        cards = {word: card.to_list() for word, card in sorted(self.scheduler.cards.items())}
+        return json.dumps(log, indent=4, ensure_ascii=False), json.dumps(cards, ensure_ascii=False)
+
+    def write(self, log_text: str, review_text: str) -> None:
+        makedirs(self.directory, exist_ok=True)
+        write_snapshot(join(self.directory, LOG_FILE), log_text)
+        write_snapshot(self.scheduler.file_path, review_text)
+
+
+class QuizService:
+    """共用的詞彙與答案索引，加上按需載入的使用者狀態與定期批次寫回"""
+
+    def __init__(self, vocabulary_file: str = DEFAULT_VOCABULARY_FILE, data_dir: str = DEFAULT_DATA_DIR, flush_interval: float = 2.0) -> None:
+        self.vocabulary = dict(iter_entries(vocabulary_file))
+        self.words = list(self.vocabulary)
+        self.position = {word: i for i, word in enumerate(self.words)}
+        self.word_set = set(self.vocabulary)
+        self.answers = AnswerIndex.load(vocabulary_file, self.vocabulary)
+        self.data_dir = data_dir
+        self.flush_interval = flush_interval
+        self.users: dict[str, UserState] = {}
+        self.loading: dict[str, asyncio.Future[UserState]] = {}
+        self.dirty: set[str] = set()
+        self.flusher: asyncio.Task[None] | None = None
+        self.stopping = asyncio.Event()
+
+    async def user(self, name: str) -> UserState:
+        """第一次使用時在執行緒中讀取檔案，同時到達的請求共用同一次讀取"""
+        state = self.users.get(name)
+        if state is not None:
+            return state
+        future = self.loading.get(name)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(None, UserState.load, join(self.data_dir, name), self.words, self.position, self.word_set)
+            self.loading[name] = future
+            try:
+                self.users[name] = await future
+            finally:
+                del self.loading[name]
+            return self.users[name]
+        return await future
+
+    async def choose_words(self, name: str, count: int) -> list[str]:
+        state = await self.user(name)
+        return state.choose_words(max(1, min(count, MAX_COUNT, len(self.words))))
+
+    async def check_answers(self, name: str, answers: list[tuple[str, str]]) -> list[dict[str, Any]]:
+        """自動判定的結果直接記錄；落在模糊區間的回傳 null，等 confirm 送回"""
+        state = await self.user(name)
+        results: list[dict[str, Any]] = []
+        graded: list[tuple[str, bool]] = []
+        for word, answer in answers:
+            if word not in self.vocabulary:
+                results.append({"word": word, "result": None, "score": 0.0, "answer": None, "error": "unknown word"})
+                continue
+            result: bool | None
+            if answer.lower().strip() in SKIP_ANSWERS:
+                result, score = False, 0.0
+            else:
+                result, score = self.answers.grade(word, answer)
+            if result is not None:
+                graded.append((word, result))
+            results.append({"word": word, "result": result, "score": round(score, 3), "answer": self.vocabulary[word]})
+        self.record(name, state, graded)
+        return results
+
+    async def confirm(self, name: str, results: list[tuple[str, bool]]) -> int:
+        state = await self.user(name)
+        confirmed = [(word, bool(correct)) for word, correct in results if word in self.vocabulary]
+        self.record(name, state, confirmed)
+        return len(confirmed)
+
+    def record(self, name: str, state: UserState, results: list[tuple[str, bool]]) -> None:
+        if results:
+            state.record(results)
+            self.dirty.add(name)
+
+    async def flush(self) -> None:
+        """把有變動的使用者整批寫回；寫檔在執行緒中進行"""
+        if not self.dirty:
+            return
+        names, self.dirty = sorted(self.dirty), set()
+        loop = asyncio.get_running_loop()
+        jobs = []
+        for name in names:
+            state = self.users[name]
+            jobs.append(loop.run_in_executor(None, state.write, *state.snapshot()))
+        for name, result in zip(names, await asyncio.gather(*jobs, return_exceptions=True)):
+            if isinstance(result, Exception):
+                print(f"保存使用者 {name} 的記錄時發生錯誤：{result}")
+                self.dirty.add(name)
+
+    async def flush_loop(self) -> None:
+        """每 flush_interval 秒寫回一次，stopping 設定後結束 (進行中的寫回會先完成)"""
+        while not self.stopping.is_set():
+            try:
+                await asyncio.wait_for(self.stopping.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                await self.flush()
+
+    async def start(self, app: web.Application) -> None:
+        self.flusher = asyncio.create_task(self.flush_loop())
+
+    async def stop(self, app: web.Application) -> None:
+        # 不取消 flusher：取消時執行緒中的寫入仍在進行，會與最後一次寫回搶用同一個暫存檔
+        self.stopping.set()
+        if self.flusher is not None:
+            await self.flusher
+            self.flusher = None
+        await self.flush()
+
+
+def user_name(request: web.Request) -> str:
+    name = request.match_info["user"]
+    if not USER_RE.match(name):
+        raise web.HTTPBadRequest(text="使用者名稱只能包含英數字、- 與 _，最多 32 字元")
+    return name
+
+
+def pairs(items: Any) -> list[tuple[str, Any]]:
+    if not isinstance(items, list) or not all(isinstance(item, list) and len(item) == 2 for item in items):
+        raise ValueError("需要 [[單字, 值], ...] 格式的陣列")
+    return [(str(word), value) for word, value in items]
+
+
+async def handle(service: QuizService, name: str, message: dict[str, Any]) -> dict[str, Any]:
+    """HTTP 與 WebSocket 共用的請求處理"""
+    kind = message.get("type")
+    if kind == "words":
+        return {"type": kind, "words": await service.choose_words(name, int(message.get("count", 10)))}
+    if kind == "answers":
+        answers = [(word, str(answer)) for word, answer in pairs(message.get("answers"))]
+        return {"type": kind, "results": await service.check_answers(name, answers)}
+    if kind == "confirm":
+        return {"type": kind, "confirmed": await service.confirm(name, pairs(message.get("results")))}
+    raise ValueError(f"未知的請求類型：{kind}")
+
+
+def create_app(service: QuizService) -> web.Application:
+    routes = web.RouteTableDef()
+
+    async def respond(request: web.Request, message: dict[str, Any]) -> web.Response:
+        try:
+            return web.json_response(await handle(service, user_name(request), message), dumps=lambda o: json.dumps(o, ensure_ascii=False))
+        except (ValueError, TypeError) as e:
+            raise web.HTTPBadRequest(text=str(e))
+
+    async def body(request: web.Request) -> dict[str, Any]:
+        try:
+            data = await request.json()
+        except ValueError:
+            raise web.HTTPBadRequest(text="請求內容不是有效的 JSON")
+        if not isinstance(data, dict):
+            raise web.HTTPBadRequest(text="請求內容必須是 JSON 物件")
+        return data
+
+    @routes.get("/api/{user}/words")
+    async def words(request: web.Request) -> web.Response:
+        return await respond(request, {"type": "words", "count": request.query.get("count", "10")})
+
+    @routes.post("/api/{user}/answers")
+    async def answers(request: web.Request) -> web.Response:
+        return await respond(request, {**await body(request), "type": "answers"})
+
+    @routes.post("/api/{user}/confirm")
+    async def confirm(request: web.Request) -> web.Response:
+        return await respond(request, {**await body(request), "type": "confirm"})
+
+    @routes.get("/ws/{user}")
+    async def websocket(request: web.Request) -> web.WebSocketResponse:
+        name = user_name(request)
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            try:
+                message = json.loads(msg.data)
+                if not isinstance(message, dict):
+                    raise ValueError("訊息必須是 JSON 物件")
+                await ws.send_str(json.dumps(await handle(service, name, message), ensure_ascii=False))
+            except (ValueError, TypeError) as e:
+                await ws.send_str(json.dumps({"type": "error", "error": str(e)}, ensure_ascii=False))
+        return ws
+
+    app = web.Application()
+    app.add_routes(routes)
+    app.on_startup.append(service.start)
+    app.on_cleanup.append(service.stop)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="多人詞彙測驗伺服器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--vocabulary", default=DEFAULT_VOCABULARY_FILE)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--flush-interval", type=float, default=2.0, help="批次寫回使用者記錄的間隔秒數")
+    args = parser.parse_args()
+    web.run_app(create_app(QuizService(args.vocabulary, args.data_dir, args.flush_interval)), host=args.host, port=args.port)
@@ -1,3 +1,8 @@
+import json, hashlib
+from os import replace, stat
+from os.path import exists
+from typing import Any
+
 files = [
     "./chapter_1/1-0.txt",
     "./chapter_1/1-1.txt",
@@ -16,76 +21,217 @@ files = [
     "./chapter_2/2-7.txt",
     "./chapter_2/2-8.txt",
 ]
+WORDS_FILE = "words.txt"
+AFFIX_FILE = "affix.txt"
+BUILD_CACHE_FILE = ".vocabulary_build.json"
+# (種類, 單字, 定義, 行號, 是否保留)；種類 0 為單字、1 為字根字首
+ParsedLine = tuple[int, str, str, int, bool]
+
+
+def is_affix(word: str) -> bool:
+    return word.startswith("-") or word.endswith("-")
+
+
+def file_digest(filename: str) -> str:
+    with open(filename, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def read_dictionary(filename: str) -> dict[str, list[str]]:
+    with open(filename, "r", encoding="utf-8") as f:
+        data = dict(line.split(": ", 2) for line in f.readlines())
+    return {k: v.replace("\n", "").split("、") for k, v in data.items()}
+
+
+def render_entry(word: str, meanings: dict[str, None], old: dict[str, list[str]]) -> str:
+    merged = set(meanings)
+    merged.update(old.get(word, ()))
+    return f"{word}: {'、'.join(sorted(merged))}\n"
+
 
+def render_dictionary(definitions: dict[str, dict[str, None]], old: dict[str, list[str]]) -> str:
+    result = [render_entry(word, meanings, old) for word, meanings in definitions.items()]
+    result.sort()
+    return "".join(result)
 
-def f1():
-    words: list[tuple[str, str, str]] = []
-    affix: list[tuple[str, str, str]] = []
+
+def write_atomic(filename: str, text: str) -> None:
+    tmp_path = filename + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    replace(tmp_path, filename)
+
+
+def scan_chapter(lines: list[str], seen: set[str]) -> tuple[list[str], list[str], list[ParsedLine]]:
+    """以 seen 去除重複的行並更新 seen，回傳 (保留的行, 保留的鍵, 每行解析結果)"""
+    output: list[str] = []
+    keys: list[str] = []
+    parsed: list[ParsedLine] = []
+    for i, line in enumerate(lines):
+        key = line.split(": ")[0].strip()
+        keep = key not in seen
+        if keep:
+            seen.add(key)
+            keys.append(key)
+            output.append(line)
+        t = line.split(":")
+        if len(t) == 2:
+            parsed.append((1 if is_affix(t[0]) else 0, t[0].strip(), t[1].strip(), i + 1, keep))
+    return (output, keys, parsed)
+
+
+def kept_entries(parsed: list[ParsedLine]) -> list[dict[str, list[str]]]:
+    """去重後仍留在章節中的單字與定義，依種類分開"""
+    entries: list[dict[str, dict[str, None]]] = [{}, {}]
+    for kind, word, meaning, _, keep in parsed:
+        if keep:
+            entries[kind].setdefault(word, {}).update(dict.fromkeys(meaning.split("、")))
+    return [{word: list(meanings) for word, meanings in by_kind.items()} for by_kind in entries]
+
+
+def remove_duplicates(files: list[str] = files, words_file: str = WORDS_FILE, affix_file: str = AFFIX_FILE) -> None:
+    """單次掃描所有章節：後面章節 (及同章節) 重複的行被移除，所有出現過的定義合併進 words.txt/affix.txt"""
+    # 每個單字的所有定義 (依出現順序的有序集合) 與出現位置
+    meanings: tuple[dict[str, dict[str, None]], dict[str, dict[str, None]]] = ({}, {})
+    locations: tuple[dict[str, list[tuple[str, str, int]]], dict[str, list[tuple[str, str, int]]]] = ({}, {})
+    # 去重後仍保留在章節中的單字，只有這些會寫回字典
+    kept: tuple[dict[str, None], dict[str, None]] = ({}, {})
+    seen: set[str] = set()
+    chapters: dict[str, str] = {}
     for file in files:
-        with open(file, "r") as f:
+        with open(file, "r", encoding="utf-8") as f:
+            output, _, parsed = scan_chapter(f.readlines(), seen)
+        for kind, word, meaning, line_no, keep in parsed:
+            meanings[kind].setdefault(word, {}).update(dict.fromkeys(meaning.split("、")))
+            locations[kind].setdefault(word, []).append((meaning, file, line_no))
+            if keep:
+                kept[kind][word] = None
+        chapters[file] = "".join(output)
+
+    duplicates: list[str] = []
+    for kind in (0, 1):
+        for word in sorted(locations[kind]):
+            for meaning, file, line_no in locations[kind][word][1:]:
+                duplicates.append(f"{word}: {meaning} [in {file} line {line_no}]\n")
+    print("".join(duplicates), end="")
+
+    dictionaries: list[tuple[str, str]] = []
+    for kind, filename in ((0, words_file), (1, affix_file)):
+        old = read_dictionary(filename)
+        definitions = {word: meanings[kind][word] for word in kept[kind]}
+        dictionaries.append((filename, render_dictionary(definitions, old)))
+    for filename, text in list(chapters.items()) + dictionaries:
+        write_atomic(filename, text)
+
+
+def snapshot(filename: str, **fields: Any) -> dict[str, Any]:
+    return {"path": filename, "mtime": stat(filename).st_mtime, "hash": file_digest(filename), **fields}
+
+
+def is_unchanged(record: dict[str, Any]) -> bool:
+    """先比對 mtime，不同時再比對內容雜湊"""
+    if not exists(record["path"]):
+        return False
+    return stat(record["path"]).st_mtime == record["mtime"] or file_digest(record["path"]) == record["hash"]
+
+
+def save_build_cache(cache_file: str, chapters: list[dict[str, Any]], dictionaries: list[str]) -> None:
+    tmp_path = cache_file + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"files": chapters, "dictionaries": [snapshot(filename) for filename in dictionaries]}, f, ensure_ascii=False)
+    replace(tmp_path, cache_file)
+
+
+def load_build_cache(cache_file: str) -> dict[str, Any] | None:
+    if not exists(cache_file):
+        return None
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def full_build(files: list[str], words_file: str, affix_file: str, cache_file: str) -> None:
+    remove_duplicates(files, words_file, affix_file)
+    seen: set[str] = set()
+    chapters: list[dict[str, Any]] = []
+    for file in files:
+        with open(file, "r", encoding="utf-8") as f:
+            _, keys, parsed = scan_chapter(f.readlines(), seen)
+        chapters.append(snapshot(file, keys=keys, entries=kept_entries(parsed)))
+    save_build_cache(cache_file, chapters, [words_file, affix_file])
+
+
+def build(files: list[str] = files, words_file: str = WORDS_FILE, affix_file: str = AFFIX_FILE, cache_file: str = BUILD_CACHE_FILE) -> None:
+    """增量建置：只重新去重有變動的章節與受其影響的後續章節，字典只重算受影響的單字
+
+    沒有快取、章節清單改變或字典在建置之外被修改時，退回完整的 remove_duplicates。
+    """
+    cache = load_build_cache(cache_file)
+    if cache is None or [record["path"] for record in cache["files"]] != files or not all(map(is_unchanged, cache["dictionaries"])):
+        full_build(files, words_file, affix_file, cache_file)
+        return
+
+    seen: set[str] = set()
+    # 快取時各章節保留的鍵的聯集，與目前已處理章節中新出現、快取時尚未出現的鍵
+    old_union: set[str] = set()
+    added: set[str] = set()
+    affected: tuple[set[str], set[str]] = (set(), set())
+    removed_meanings: tuple[dict[str, dict[str, None]], dict[str, dict[str, None]]] = ({}, {})
+    duplicates: list[str] = []
+    chapters: list[dict[str, Any]] = []
+    rewrites: dict[str, str] = {}
+    for record in cache["files"]:
+        old_keys = set(record["keys"])
+        # 內容未變且前面章節沒有新增此章節的鍵時，去重結果與上次相同
+        if is_unchanged(record) and added.isdisjoint(old_keys):
+            seen |= old_keys
+            old_union |= old_keys
+            chapters.append(record)
+            continue
+        file = record["path"]
+        with open(file, "r", encoding="utf-8") as f:
             lines = f.readlines()
-            for i, line in enumerate(lines):
-                t = line.split(":")
-                if len(t) == 2:
-                    if t[0].startswith("-") or t[0].endswith("-"):
-                        affix.append((t[0].strip(), t[1].strip(), file + " line " + str(i + 1)))
-                    else:
-                        words.append((t[0].strip(), t[1].strip(), file + " line " + str(i + 1)))
-
-    def f3(l: list[tuple[str, str, str]], filename: str):
-        with open(filename, "r") as f:
-            data = f.readlines()
-        data = dict(line.split(": ", 2) for line in data)
-        data = {k: v.replace("\n", "") for k, v in data.items()}
-        data = {k: v.split("、") for k, v in data.items()}
-        l.sort(key=lambda x: x[0])
-        p: tuple[str, str, str] = ("", "", "")
-        result: list[str] = []
-        for i in l:
-            if i[0] == p[0]:
-                if p[0] in data:
-                    p = (i[0], "、".join(sorted(list(set(p[1].split("、") + i[1].split("、") + data[p[0]])))), p[2])
-                else:
-                    p = (i[0], "、".join(sorted(list(set(p[1].split("、") + i[1].split("、"))))), p[2])
-                print(f"{i[0]}: {i[1]} [in {i[2]}]")
-            else:
-                if p[0] != "":
-                    if p[0] in data:
-                        result.append(f"{p[0]}: {"、".join(sorted(list(set(p[1].split("、") + data[p[0]]))))}\n")
-                    else:
-                        result.append(f"{p[0]}: {p[1]}\n")
-                p = i
-        if p[0] != "":
-            if p[0] in data:
-                result.append(f"{p[0]}: {"、".join(sorted(list(set(p[1].split("、") + data[p[0]]))))}\n")
+        output, keys, parsed = scan_chapter(lines, seen)
+        old_union |= old_keys
+        added = {key for key in added.union(keys) if key not in old_union}
+        for kind, word, meaning, line_no, keep in parsed:
+            affected[kind].add(word)
+            if not keep:
+                removed_meanings[kind].setdefault(word, {}).update(dict.fromkeys(meaning.split("、")))
+                duplicates.append(f"{word}: {meaning} [in {file} line {line_no}]\n")
+        for kind, by_kind in enumerate(record["entries"]):
+            affected[kind].update(by_kind)
+        if len(output) != len(lines):
+            rewrites[file] = "".join(output)
+        chapters.append({"path": file, "keys": keys, "entries": kept_entries(parsed)})
+    print("".join(duplicates), end="")
+
+    for file, text in rewrites.items():
+        write_atomic(file, text)
+    chapters = [record if "hash" in record else snapshot(record["path"], keys=record["keys"], entries=record["entries"]) for record in chapters]
+
+    for kind, filename in ((0, words_file), (1, affix_file)):
+        if not affected[kind]:
+            continue
+        old = read_dictionary(filename)
+        with open(filename, "r", encoding="utf-8") as f:
+            lines_by_word = {line.split(": ", 1)[0]: line for line in f}
+        for word in affected[kind]:
+            meanings = dict(removed_meanings[kind].get(word, {}))
+            present = False
+            for record in chapters:
+                if word in record["entries"][kind]:
+                    present = True
+                    meanings.update(dict.fromkeys(record["entries"][kind][word]))
+            if present:
+                lines_by_word[word] = render_entry(word, meanings, old)
             else:
-                result.append(f"{p[0]}: {p[1]}\n")
-        result.sort()
-        with open(filename, "w") as f:
-            f.write("".join(result))
-
-    f3(words, "words.txt")
-    f3(affix, "affix.txt")
-
-
-def f2():
-    for input_f in files:
-        data: set[str] = set()
-        for f in files:
-            if f == input_f:
-                break
-            with open(f, "r", encoding="utf-8") as file:
-                for line in file:
-                    data.add(line.split(": ")[0].strip())
-        with open(input_f, "r", encoding="utf-8") as file:
-            lines = file.readlines()
-        with open(input_f, "w", encoding="utf-8") as file:
-            for line in lines:
-                if line.split(": ")[0].strip() not in data:
-                    file.write(line)
-                    data.add(line.split(": ")[0].strip())
-
-
-f1()
-f2()
-f1()
+                lines_by_word.pop(word, None)
+        write_atomic(filename, "".join(sorted(lines_by_word.values())))
+    save_build_cache(cache_file, chapters, [words_file, affix_file])
+
+
+if __name__ == "__main__":
+    build()
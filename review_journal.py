@@ -0,0 +1,86 @@
+import json, hashlib, time
+from os import fsync, replace
+from os.path import exists
+from typing import Iterable, Iterator
+
+DEFAULT_JOURNAL_FILE = "log.journal.jsonl"
+
+
+def snapshot_digest(file_path: str) -> str:
+    if not exists(file_path):
+        return ""
+    with open(file_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def write_snapshot(file_path: str, text: str) -> None:
+    """寫入暫存檔並 fsync 後再取代，寫入中斷不會損壞原檔"""
+    tmp_path = file_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        fsync(f.fileno())
+    replace(tmp_path, file_path)
+
+
+class ReviewJournal:
+    """只附加的複習事件日誌 (JSONL)，每行為 [單字, 是否答對, 時間戳]
+
+    第一行記錄建立日誌時各快照檔 (log.json、review.json) 的雜湊；壓縮時先寫入新快照再以新的雜湊重設日誌，
+    若在兩者之間中斷，快照雜湊已不符，日誌不會被重複套用。
+    """
+
+    def __init__(self, file_path: str = DEFAULT_JOURNAL_FILE) -> None:
+        self.file_path = file_path
+        self.snapshots: dict[str, str] = {}
+        self.count = 0
+        # 上次附加時中斷留下不完整的最後一行，下次附加前先換行
+        self.torn = False
+        if exists(file_path):
+            with open(file_path, "r", encoding="utf-8") as f:
+                line = f.readline()
+                try:
+                    self.snapshots = json.loads(line)["snapshots"]
+                except (ValueError, KeyError, TypeError):
+                    self.snapshots = {}
+                for line in f:
+                    self.count += 1
+                self.torn = not line.endswith("\n")
+
+    def exists(self) -> bool:
+        return bool(self.snapshots)
+
+    def applies_to(self, snapshot_file: str) -> bool:
+        """日誌是否建立在此快照檔目前的內容之上"""
+        return snapshot_file in self.snapshots and self.snapshots[snapshot_file] == snapshot_digest(snapshot_file)
+
+    def events(self) -> Iterator[tuple[str, bool, float]]:
+        """依序讀出事件，略過寫入中斷而不完整的最後一行"""
+        if not self.exists():
+            return
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            f.readline()
+            for line in f:
+                try:
+                    word, correct, timestamp = json.loads(line)
+                except ValueError:
+                    continue
+                yield (word, bool(correct), timestamp)
+
+    def append(self, results: Iterable[tuple[str, bool]], timestamp: float | None = None) -> None:
+        """附加本次測試的結果並 fsync，成本只與答題數有關"""
+        timestamp = time.time() if timestamp is None else timestamp
+        lines = [json.dumps([word, int(correct), round(timestamp, 3)], ensure_ascii=False) + "\n" for word, correct in results]
+        with open(self.file_path, "a", encoding="utf-8") as f:
+            f.write(("\n" if self.torn else "") + "".join(lines))
+            f.flush()
+            fsync(f.fileno())
+        self.count += len(lines)
+        self.torn = False
+
+    def reset(self, snapshot_files: Iterable[str]) -> None:
+        """快照已寫入後呼叫：以新的快照雜湊開始一份空日誌"""
+        self.snapshots = {file_path: snapshot_digest(file_path) for file_path in snapshot_files}
+        write_snapshot(self.file_path, json.dumps({"snapshots": self.snapshots}) + "\n")
+        self.count = 0
+        self.torn = False
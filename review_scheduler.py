@@ -0,0 +1,131 @@
+import json, heapq, time, zlib
+from typing import Container
+from os import fsync, replace
+from os.path import exists
+
+DEFAULT_REVIEW_FILE = "review.json"
+DAY = 86400
+# 答錯後在同一天內再次出現的間隔
+LAPSE_DELAY = 600
+MAX_INTERVAL = 365
+INITIAL_EASE = 2.5
+MIN_EASE = 1.3
+# 測試只有對錯兩種結果，對應 SM-2 的評分
+CORRECT_GRADE = 4
+WRONG_GRADE = 1
+# 轉換時答錯的單字依淨答錯次數錯開到期時間 (每多錯一次提早這麼多秒)，讓最弱的單字先出現
+MIGRATION_SPREAD = 60
+
+
+class Card:
+    __slots__ = ("interval", "ease", "due", "reps", "lapses")
+
+    def __init__(self, interval: float = 0, ease: float = INITIAL_EASE, due: float = 0, reps: int = 0, lapses: int = 0) -> None:
+        self.interval = interval
+        self.ease = ease
+        self.due = due
+        self.reps = reps
+        self.lapses = lapses
+
+    def review(self, correct: bool, now: float) -> None:
+        """SM-2：答對時間隔依 1、6、interval * ease 天增長，答錯時重新開始"""
+        grade = CORRECT_GRADE if correct else WRONG_GRADE
+        self.ease = max(MIN_EASE, self.ease + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02))
+        if correct:
+            self.reps += 1
+            if self.reps == 1:
+                self.interval = 1
+            elif self.reps == 2:
+                self.interval = 6
+            else:
+                self.interval = min(round(self.interval * self.ease, 2), MAX_INTERVAL)
+            self.due = now + self.interval * DAY
+        else:
+            self.reps = 0
+            self.lapses += 1
+            self.interval = 0
+            self.due = now + LAPSE_DELAY
+
+    def to_list(self) -> list[float]:
+        return [self.interval, round(self.ease, 3), round(self.due), self.reps, self.lapses]
+
+
+class ReviewScheduler:
+    """每個單字的複習間隔、難易度與到期時間，以到期時間為鍵的最小堆積取出到期單字
+
+    堆積採延遲刪除：單字被複習後直接推入新的項目，取出時略過到期時間已不符的舊項目。
+    """
+
+    def __init__(self, cards: dict[str, Card], vocabulary: Container[str], file_path: str = DEFAULT_REVIEW_FILE) -> None:
+        self.file_path = file_path
+        self.cards = cards
+        self.vocabulary = vocabulary
+        self.heap = [(card.due, word) for word, card in cards.items() if word in vocabulary]
+        heapq.heapify(self.heap)
+
+    @classmethod
+    def load(cls, vocabulary: Container[str], log: dict[str, int], file_path: str = DEFAULT_REVIEW_FILE) -> "ReviewScheduler":
+        """讀取複習紀錄；檔案不存在或損壞 (如寫入中斷) 時由 log.json 的答對/答錯次數轉換"""
+        if exists(file_path):
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    cards = {word: Card(*values) for word, values in json.load(f).items()}
+                return cls(cards, vocabulary, file_path)
+            except (ValueError, TypeError, AttributeError) as e:
+                print(f"\n讀取複習紀錄時發生錯誤：{e}，將由歷史記錄重建。")
+        return cls(migrate_log(log), vocabulary, file_path)
+
+    def due_words(self, limit: int, now: float | None = None) -> list[str]:
+        """依到期時間回傳最多 limit 個已到期的單字，O(limit log n)"""
+        now = time.time() if now is None else now
+        result: list[str] = []
+        taken: list[tuple[float, str]] = []
+        while self.heap and len(result) < limit and self.heap[0][0] <= now:
+            due, word = heapq.heappop(self.heap)
+            card = self.cards.get(word)
+            if card is None or card.due != due or word in result:
+                continue
+            result.append(word)
+            taken.append((due, word))
+        # 取出的單字在複習前仍然到期，放回堆積
+        for item in taken:
+            heapq.heappush(self.heap, item)
+        return result
+
+    def review(self, word: str, correct: bool, now: float | None = None) -> None:
+        card = self.cards.setdefault(word, Card())
+        card.review(correct, time.time() if now is None else now)
+        if word in self.vocabulary:
+            heapq.heappush(self.heap, (card.due, word))
+        # 過時項目過多時重建堆積，避免無限增長
+        if len(self.heap) > 2 * len(self.cards) + 64:
+            self.heap = [(card.due, word) for word, card in self.cards.items() if word in self.vocabulary]
+            heapq.heapify(self.heap)
+
+    def save(self) -> None:
+        tmp_path = self.file_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({word: card.to_list() for word, card in sorted(self.cards.items())}, f, ensure_ascii=False)
+            f.flush()
+            fsync(f.fileno())
+        replace(tmp_path, self.file_path)
+
+
+def migrate_log(log: dict[str, int], now: float | None = None) -> dict[str, Card]:
+    """答對 n 次視為連續 n 次答對的複習；答錯 n 次視為 n 次答錯，立即到期
+
+    答錯越多次的到期時間越早，同樣次數的再以單字雜湊在 MIGRATION_SPREAD 內錯開，避免依字母順序複習。
+    """
+    now = time.time() if now is None else now
+    cards: dict[str, Card] = {}
+    for word, count in log.items():
+        if count == 0:
+            continue
+        card = Card(due=now)
+        for _ in range(abs(count)):
+            card.review(count > 0, now)
+        if count < 0:
+            jitter = zlib.crc32(word.encode("utf-8")) % 1000 / 1000 * MIGRATION_SPREAD
+            card.due = now + count * MIGRATION_SPREAD + jitter
+        cards[word] = card
+    return cards
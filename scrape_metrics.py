@@ -0,0 +1,145 @@
+import sys, json, math, time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Iterator, TextIO
+
+# 直方圖以 0.1 毫秒起、每格成長 10% 的對數刻度分桶，分位數誤差約 10%
+HISTOGRAM_BASE = 0.0001
+HISTOGRAM_GROWTH = 1.1
+STAGES = ("fetch", "search", "parse", "write", "word")
+RECENT_MESSAGES = 1000
+
+
+class Histogram:
+    """固定記憶體的延遲直方圖"""
+
+    def __init__(self) -> None:
+        self.buckets: dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        index = max(0, math.ceil(math.log(max(seconds, HISTOGRAM_BASE) / HISTOGRAM_BASE, HISTOGRAM_GROWTH)))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """回傳所在分桶的上界 (不超過實際最大值)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(HISTOGRAM_BASE * HISTOGRAM_GROWTH**index, self.max)
+        return self.max
+
+
+class ScrapeMetrics:
+    """爬蟲的計數器、各階段延遲直方圖與 JSONL 事件輸出
+
+    每個單字的各階段 (fetch、search、parse、write) 以 span 計時，整個單字從開始抓取到完成記為 word；
+    訊息只保留最近 RECENT_MESSAGES 筆，完整紀錄寫入事件檔。
+    """
+
+    def __init__(self, events_file: str | None = None, progress_interval: float = 1.0, stream: TextIO = sys.stderr) -> None:
+        self.counters: dict[str, int] = {}
+        self.histograms: dict[str, Histogram] = {stage: Histogram() for stage in STAGES}
+        self.messages: deque[str] = deque(maxlen=RECENT_MESSAGES)
+        self.events = open(events_file, "a", encoding="utf-8", buffering=1) if events_file else None
+        self.progress_interval = progress_interval
+        self.stream = stream
+        self.live = stream.isatty()
+        self.progress_shown = False
+        self.last_progress = 0.0
+        self.started = time.monotonic()
+        self.word_started: dict[str, float] = {}
+
+    def emit(self, kind: str, **fields: Any) -> None:
+        if self.events is not None:
+            self.events.write(json.dumps({"ts": round(time.time(), 3), "event": kind, **fields}, ensure_ascii=False) + "\n")
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def gauge(self, name: str, value: int) -> None:
+        self.counters[name] = value
+
+    def observe(self, stage: str, seconds: float, word: str | None = None, **fields: Any) -> None:
+        self.histograms.setdefault(stage, Histogram()).observe(seconds)
+        self.emit("span", stage=stage, word=word, ms=round(seconds * 1000, 2), **fields)
+
+    @contextmanager
+    def span(self, stage: str, word: str | None = None) -> Iterator[None]:
+        start = time.monotonic()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.observe(stage, time.monotonic() - start, word, ok=ok)
+
+    def begin_word(self, word: str) -> None:
+        self.word_started[word] = time.monotonic()
+
+    def end_word(self, word: str, outcome: str) -> None:
+        """單字離開管線時呼叫，記錄整體耗時與結果計數"""
+        self.incr(outcome)
+        start = self.word_started.pop(word, None)
+        if start is not None:
+            self.observe("word", time.monotonic() - start, word, outcome=outcome)
+
+    def message(self, word: str | None, text: str, **fields: Any) -> None:
+        """顯示並保留人類可讀的訊息，同時寫入事件檔"""
+        self.clear_progress()
+        print(text)
+        self.messages.append(text)
+        self.emit("message", word=word, text=text, **fields)
+
+    def clear_progress(self) -> None:
+        if self.progress_shown:
+            self.stream.write("\r\033[K")
+            self.progress_shown = False
+
+    def progress(self, done: int, total: int, force: bool = False) -> None:
+        """節流更新同一行的進度與吞吐量"""
+        now = time.monotonic()
+        if not force and now - self.last_progress < self.progress_interval:
+            return
+        self.last_progress = now
+        elapsed = now - self.started
+        rate = done / elapsed if elapsed else 0.0
+        self.emit("progress", done=done, total=total, rate=round(rate, 2), **self.counters)
+        if not self.live:
+            return
+        counters = "  ".join(f"{name} {value}" for name, value in sorted(self.counters.items()))
+        self.stream.write(f"\r\033[K進度 {done}/{total}  {rate:.2f} 字/秒  {counters}")
+        self.stream.flush()
+        self.progress_shown = True
+
+    def summary(self) -> str:
+        # 中文字佔兩格寬，標題的欄寬相應縮短以與數字欄對齊
+        lines = [f"{'階段':<6}{'次數':>6}{'p50 ms':>10}{'p95 ms':>10}{'最大 ms':>8}"]
+        for stage, histogram in self.histograms.items():
+            if histogram.count:
+                lines.append(
+                    f"{stage:<8}{histogram.count:>8}{histogram.quantile(0.5) * 1000:>10.1f}"
+                    f"{histogram.quantile(0.95) * 1000:>10.1f}{histogram.max * 1000:>10.1f}"
+                )
+        if self.counters:
+            lines.append("  ".join(f"{name} {value}" for name, value in sorted(self.counters.items())))
+        return "\n".join(lines)
+
+    def close(self) -> None:
+        self.clear_progress()
+        stages = {
+            stage: {"count": h.count, "p50": h.quantile(0.5), "p95": h.quantile(0.95), "max": h.max} for stage, h in self.histograms.items() if h.count
+        }
+        self.emit("summary", counters=self.counters, stages=stages)
+        if self.events is not None:
+            self.events.close()
+            self.events = None
@@ -0,0 +1,206 @@
+import re, sqlite3, hashlib, argparse
+from os import listdir, stat
+from os.path import join, exists
+from vocabulary import iter_entries
+
+DEFAULT_INDEX_FILE = "search_index.sqlite"
+ARCHIVE_SOURCE = "etymology"
+# 英文依單字切分，中文 (CJK) 以單字與雙字 n-gram 切分
+WORD_RE = re.compile(r"[a-z0-9]+(?:['-][a-z0-9]+)*")
+CJK_RUN_RE = re.compile("[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+
+
+def tokenize(text: str) -> set[str]:
+    text = text.lower()
+    tokens = set(WORD_RE.findall(text))
+    for run in CJK_RUN_RE.findall(text):
+        tokens.update(run)
+        tokens.update(run[i : i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def query_tokens(text: str) -> set[str]:
+    """查詢用的切分：中文只取雙字 n-gram (單字查詢時取單字)，減少交集的候選數"""
+    text = text.lower()
+    tokens = set(WORD_RE.findall(text))
+    for run in CJK_RUN_RE.findall(text):
+        if len(run) == 1:
+            tokens.add(run)
+        else:
+            tokens.update(run[i : i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class SearchIndex:
+    """etymology_archive 與 words.txt/affix.txt 的倒排索引，支援增量更新"""
+
+    def __init__(self, file_path: str = DEFAULT_INDEX_FILE, commit_every: int = 50) -> None:
+        self.file_path = file_path
+        self.commit_every = commit_every
+        self.uncommitted = 0
+        # 抓取管線中由 ArchiveWriter 的執行緒更新，存取由該執行緒依序進行
+        self.conn = sqlite3.connect(file_path, check_same_thread=False)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS docs (
+                id INTEGER PRIMARY KEY, source TEXT NOT NULL, key TEXT NOT NULL,
+                content TEXT NOT NULL, digest TEXT NOT NULL, mtime REAL NOT NULL DEFAULT 0,
+                UNIQUE (source, key)
+            );
+            CREATE TABLE IF NOT EXISTS postings (token TEXT NOT NULL, doc INTEGER NOT NULL, PRIMARY KEY (token, doc)) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc);
+            """
+        )
+
+    def update(self, source: str, key: str, content: str, mtime: float = 0) -> bool:
+        """內容有變更時才重新建立該文件的索引，回傳是否有更新"""
+        content_digest = digest(content)
+        row = self.conn.execute("SELECT id, digest FROM docs WHERE source = ? AND key = ?", (source, key)).fetchone()
+        if row and row[1] == content_digest:
+            if mtime:
+                self.conn.execute("UPDATE docs SET mtime = ? WHERE id = ?", (mtime, row[0]))
+            return False
+        if row:
+            doc_id = row[0]
+            self.conn.execute("DELETE FROM postings WHERE doc = ?", (doc_id,))
+            self.conn.execute("UPDATE docs SET content = ?, digest = ?, mtime = ? WHERE id = ?", (content, content_digest, mtime, doc_id))
+        else:
+            cursor = self.conn.execute(
+                "INSERT INTO docs (source, key, content, digest, mtime) VALUES (?, ?, ?, ?, ?)", (source, key, content, content_digest, mtime)
+            )
+            doc_id = cursor.lastrowid
+        self.conn.executemany("INSERT INTO postings (token, doc) VALUES (?, ?)", ((token, doc_id) for token in tokenize(f"{key} {content}")))
+        self.uncommitted += 1
+        if self.uncommitted >= self.commit_every:
+            self.commit()
+        return True
+
+    def remove(self, source: str, key: str) -> None:
+        row = self.conn.execute("SELECT id FROM docs WHERE source = ? AND key = ?", (source, key)).fetchone()
+        if row:
+            self.conn.execute("DELETE FROM postings WHERE doc = ?", (row[0],))
+            self.conn.execute("DELETE FROM docs WHERE id = ?", (row[0],))
+            self.uncommitted += 1
+
+    def sync_archive(self, archive_dir: str) -> int:
+        """只讀取 mtime 有變動的 .md 檔，並移除已刪除的檔案"""
+        known = dict(self.conn.execute("SELECT key, mtime FROM docs WHERE source = ?", (ARCHIVE_SOURCE,)).fetchall())
+        seen: set[str] = set()
+        changed = 0
+        for f_name in listdir(archive_dir):
+            if not f_name.endswith(".md"):
+                continue
+            word = f_name[: -len(".md")]
+            seen.add(word)
+            file_path = join(archive_dir, f_name)
+            mtime = stat(file_path).st_mtime
+            if known.get(word) == mtime:
+                continue
+            with open(file_path, "r", encoding="utf-8") as f:
+                changed += self.update(ARCHIVE_SOURCE, word, f.read(), mtime)
+        for word in known.keys() - seen:
+            self.remove(ARCHIVE_SOURCE, word)
+            changed += 1
+        self.commit()
+        return changed
+
+    def sync_vocabulary(self, file_path: str) -> int:
+        """以檔名為來源同步 `單字: 定義` 格式的詞彙檔"""
+        if not exists(file_path):
+            return 0
+        source = file_path.replace("\\", "/").split("/")[-1]
+        entries = dict(iter_entries(file_path))
+        known = {row[0] for row in self.conn.execute("SELECT key FROM docs WHERE source = ?", (source,))}
+        changed = sum(self.update(source, word, definition) for word, definition in entries.items())
+        for word in known - entries.keys():
+            self.remove(source, word)
+            changed += 1
+        self.commit()
+        return changed
+
+    def search(self, query: str, mode: str = "token", source: str | None = None, limit: int = 50) -> list[tuple[str, str, str]]:
+        """mode: token (所有詞都出現)、prefix (詞首相符)、substring (原文包含)；回傳 [(來源, 鍵, 摘要)]"""
+        if mode == "prefix":
+            prefix = query.lower().strip()
+            if not prefix:
+                return []
+            doc_ids: set[int] | None
+            sql = "SELECT DISTINCT doc FROM postings WHERE token >= ? AND token < ?"
+            doc_ids = {row[0] for row in self.conn.execute(sql, (prefix, prefix + "\uffff"))}
+            needle = prefix
+        else:
+            tokens = query_tokens(query)
+            if mode == "substring":
+                # 英文片段不一定是完整單字，只用中文 n-gram 篩選候選文件
+                tokens = {t for t in tokens if CJK_RUN_RE.fullmatch(t)}
+            doc_ids = self.intersect(tokens) if tokens else None
+            needle = query.lower().strip()
+            if mode == "substring" and doc_ids is None:
+                # 查詢中沒有可用的詞，直接掃描原文
+                doc_ids = {row[0] for row in self.conn.execute("SELECT id FROM docs WHERE instr(lower(content), ?) > 0", (needle,))}
+        if not doc_ids:
+            return []
+        results: list[tuple[str, str, str]] = []
+        placeholders = ",".join("?" * len(doc_ids))
+        sql = f"SELECT source, key, content FROM docs WHERE id IN ({placeholders}) ORDER BY source, key"
+        for doc_source, key, content in self.conn.execute(sql, tuple(doc_ids)):
+            if source is not None and doc_source != source:
+                continue
+            position = content.lower().find(needle)
+            if mode == "substring" and position < 0 and needle not in key.lower():
+                continue
+            results.append((doc_source, key, snippet(content, position, len(needle))))
+            if len(results) >= limit:
+                break
+        return results
+
+    def intersect(self, tokens: set[str]) -> set[int]:
+        # 由最少文件的詞開始交集
+        counts = sorted((self.conn.execute("SELECT count(*) FROM postings WHERE token = ?", (t,)).fetchone()[0], t) for t in tokens)
+        result: set[int] | None = None
+        for _, token in counts:
+            docs = {row[0] for row in self.conn.execute("SELECT doc FROM postings WHERE token = ?", (token,))}
+            result = docs if result is None else result & docs
+            if not result:
+                return set()
+        return result or set()
+
+    def commit(self) -> None:
+        self.conn.commit()
+        self.uncommitted = 0
+
+    def close(self) -> None:
+        self.commit()
+        self.conn.close()
+
+
+def snippet(content: str, position: int, length: int, width: int = 30) -> str:
+    if position < 0:
+        return content[: width * 2].replace("\n", " ")
+    start = max(0, position - width)
+    return ("..." if start else "") + content[start : position + length + width].replace("\n", " ") + "..."
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="搜尋辭源庫與詞彙")
+    parser.add_argument("query", nargs="?", help="查詢字串")
+    parser.add_argument("--mode", choices=("token", "prefix", "substring"), default="token")
+    parser.add_argument("--source", help="只搜尋指定來源 (etymology、words.txt、affix.txt)")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--no-sync", action="store_true", help="查詢前不同步檔案變更")
+    args = parser.parse_args()
+
+    index = SearchIndex()
+    if not args.no_sync:
+        changed = index.sync_archive("etymology_archive")
+        changed += index.sync_vocabulary("words.txt") + index.sync_vocabulary("affix.txt")
+        if changed:
+            print(f"已更新 {changed} 筆索引")
+    if args.query:
+        for doc_source, key, text in index.search(args.query, args.mode, args.source, args.limit):
+            print(f"[{doc_source}] {key}: {text}")
+    index.close()
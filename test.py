@@ -1,66 +1,143 @@
-from json import dump, load
-from random import choices
-from typing import Sequence
-from wcwidth import wcswidth
+import heapq, random, argparse
+from functools import lru_cache
+from json import dumps, load
+from os.path import exists
+from typing import Iterable, Iterator, Mapping, Sequence
+from wcwidth import wcswidth, wcwidth
+from etymology_index import EtymologyIndex
+from answer_index import AnswerIndex
+from word_sampler import WordSampler
+from review_scheduler import ReviewScheduler
+from review_journal import ReviewJournal, write_snapshot
+from vocabulary import VocabularyIndex, iter_entries
+from affix_index import AffixIndex
+from quiz_constants import AFFIRMATIVE_RESPONSES, DEFAULT_VOCABULARY_FILE, LOG_FILE, NEGATIVE_RESPONSES, SKIP_ANSWERS
 
 # 常量定義
-DEFAULT_VOCABULARY_FILE = "words.txt"
-LOG_FILE = "log.json"
-CHINESE_PARTICLES = "的地得"
-AFFIRMATIVE_RESPONSES = ("y", "yes", "是", "对", "對", "1")
-NEGATIVE_RESPONSES = ("n", "no", "否", "错", "錯", "0")
-SKIP_ANSWERS = ("n", "x", "", " ")
+AFFIX_FILE = "affix.txt"
+# 日誌累積超過此事件數時壓縮回 log.json/review.json
+COMPACT_EVERY = 1000
 SEPARATOR = "=" * 50
+# 同一個儲存格文字的顯示寬度只計算一次
+WIDTH_CACHE_SIZE = 65536
+ELLIPSIS = "…"
+# 超過此寬度的答案欄以 … 截斷；網址欄保持完整以便點擊
+ANSWER_WIDTH = 40
+HISTORY_WORD_WIDTH = 40
+PAGE_SIZE = 10
+
+
+@lru_cache(maxsize=WIDTH_CACHE_SIZE)
+def display_width(text: str) -> int:
+    """終端機中的顯示寬度 (中文字佔兩格)，含無法顯示的字元時退回字元數"""
+    width = wcswidth(text)
+    return width if width >= 0 else len(text)
+
+
+def elide(text: str, width: int) -> str:
+    """超過 width 時截斷並加上 …，結果的顯示寬度不超過 width"""
+    if display_width(text) <= width:
+        return text
+    result: list[str] = []
+    used = 0
+    for char in text:
+        char_width = max(wcwidth(char), 0)
+        if used + char_width > width - 1:
+            break
+        result.append(char)
+        used += char_width
+    return "".join(result) + ELLIPSIS
+
+
+def page_through(lines: Iterable[str], page_size: int = PAGE_SIZE) -> None:
+    """逐行輸出，每 page_size 行暫停一次；只消耗實際顯示的行"""
+    for i, line in enumerate(lines):
+        print(line)
+        if i % page_size == page_size - 1:
+            user_input = input("按 Enter 鍵繼續(輸入 q 或 exit 離開)...")
+            if user_input.lower() in ("q", "exit"):
+                break
+            print("\033[F\033[K", end="")
 
 
 class DisplayInfo:
-    def __init__(self, title: Sequence[object] | str, empty_msg: str) -> None:
+    """以 [欄位] 對齊的表格；max_widths 指定各欄的最大顯示寬度 (None 為不限)，超過時以 … 截斷
+
+    add 會保留列，measure 只更新欄寬，讓大量的列可以先量測寬度、之後再以 generator 逐行產生。
+    """
+
+    def __init__(self, title: Sequence[object] | str, empty_msg: str, max_widths: Sequence[int | None] | None = None) -> None:
         if isinstance(title, str):
             title = tuple(i.strip() for i in title.split("|"))
         else:
             title = tuple(str(t).strip() for t in title)
         self.show = [title]
         self.size = len(title)
-        self.length: list[int] = [wcswidth(t) for t in title]
+        self.max_widths = tuple(max_widths) if max_widths else (None,) * self.size
+        self.length: list[int] = [display_width(t) for t in title]
         self.empty_msg = empty_msg
 
-    def add(self, item: Sequence[object]) -> None:
+    def measure(self, item: Sequence[object]) -> tuple[str, ...]:
+        """整理成 size 欄並截斷過寬的儲存格，更新欄寬後回傳"""
         if isinstance(item, str):
-            item = tuple(i.strip() for i in item.split("|"))
+            cells = tuple(i.strip() for i in item.split("|"))
         else:
-            item = tuple(str(i).strip() for i in item)
-        if len(item) > self.size:
+            cells = tuple(str(i).strip() for i in item)
+        if len(cells) > self.size:
             raise ValueError("Item length exceeds title length.")
-        elif len(item) < self.size:
-            item = item + tuple([""] * (self.size - len(item)))
-        self.show.append(item)
-        self.length = [max(self.length[i], wcswidth(item[i])) for i in range(self.size)]
+        elif len(cells) < self.size:
+            cells = cells + tuple([""] * (self.size - len(cells)))
+        cells = tuple(cell if limit is None else elide(cell, limit) for cell, limit in zip(cells, self.max_widths))
+        self.length = [max(length, display_width(cell)) for length, cell in zip(self.length, cells)]
+        return cells
+
+    def add(self, item: Sequence[object]) -> None:
+        self.show.append(self.measure(item))
+
+    def format(self, row: Sequence[str]) -> str:
+        return "".join(f"[{cell}" + " " * (length - display_width(cell)) + "]" for cell, length in zip(row, self.length))
+
+    def lines(self, rows: Iterable[Sequence[str]] | None = None) -> Iterator[str]:
+        """表頭與各列；rows 為已 measure 過的列 (可延遲產生)，預設為 add 加入的列"""
+        yield self.format(self.show[0])
+        empty = True
+        for row in self.show[1:] if rows is None else rows:
+            empty = False
+            yield self.format(row)
+        if empty:
+            yield self.empty_msg
 
     def display(self) -> None:
-        for row in self.show:
-            for j in range(self.size):
-                print(f"[{row[j]}" + " " * (self.length[j] - wcswidth(row[j])) + "]", end="")
-            print()
-        if len(self.show) == 1:
-            print(self.empty_msg)
+        for line in self.lines():
+            print(line)
 
 
 class VocabularyTester:
-    def __init__(self, vocabulary_file: str = DEFAULT_VOCABULARY_FILE) -> None:
+    def __init__(self, vocabulary_file: str = DEFAULT_VOCABULARY_FILE, lazy: bool = False, auto_accept: bool = False) -> None:
         self.vocabulary_file = vocabulary_file
+        # auto_accept 時只有少量錯字 (相似度 >= FUZZY_ACCEPT) 的答案也直接算對，不再詢問
+        self.auto_accept = auto_accept
+        # lazy 時只建立排序的位移索引，定義在需要時才從檔案讀取；啟動時不逐一走訪所有單字
+        self.lazy = lazy
         self.vocabulary = self.load_vocabulary()
-        self.log = self.load_log()
-
-    def load_vocabulary(self) -> dict[str, str]:
+        # 正確答案的變體只在詞彙檔變動時重新解析；lazy 時改為單字被批改時才解析
+        self.answers = AnswerIndex.on_demand(self.vocabulary) if lazy else AnswerIndex.load(vocabulary_file, self.vocabulary)
+        self.journal = ReviewJournal()
+        self._load_state()
+        # 打包索引存在時 (python etymology_index.py) 直接顯示辭源，否則只提供搜尋網址
+        self.etymology = EtymologyIndex.open_if_exists()
+        # 單字與詞綴的對應，詞綴測試使用；沒有 affix.txt 時為 None，lazy 時第一次詞綴測試才載入
+        self.affixes = None if lazy else self.load_affixes()
+        self.affixes_loaded = not lazy
+
+    def load_affixes(self) -> AffixIndex | None:
+        return AffixIndex.load(AFFIX_FILE, self.vocabulary_file, self.vocabulary) if exists(AFFIX_FILE) else None
+
+    def load_vocabulary(self) -> Mapping[str, str]:
         try:
-            with open(self.vocabulary_file, "r", encoding="utf-8") as file:
-                vocabulary: dict[str, str] = {}
-                for line in file:
-                    line = line.strip()
-                    if ": " in line:
-                        parts = line.split(": ", 1)
-                        vocabulary[parts[0]] = parts[1]
-                return vocabulary
+            if self.lazy:
+                return VocabularyIndex(self.vocabulary_file)
+            return dict(iter_entries(self.vocabulary_file))
         except FileNotFoundError:
             print(f"錯誤：找不到詞彙文件 '{self.vocabulary_file}'")
             exit(1)
@@ -86,18 +163,21 @@ class VocabularyTester:
                 exit(0)
 
     def choose_words(self, test_count: int) -> list[str]:
-        """根據歷史記錄的準確率選擇測試單詞，錯誤率越高的單詞被選中的機會越大"""
-        max_accuracy = max(self.log.values(), default=0)
-        weights = [max_accuracy - self.log.get(word, 0) + 1 for word in self.vocabulary.keys()]
-        selected_words: list[str] = []
-        while len(selected_words) < test_count:
-            for word in choices(list(self.vocabulary.keys()), weights, k=test_count - len(selected_words)):
-                if word not in selected_words:
-                    selected_words.append(word)
-                if len(selected_words) >= test_count:
-                    break
+        """優先選擇已到期需要複習的單詞，不足的部分根據歷史記錄的準確率選擇，錯誤率越高的單詞被選中的機會越大"""
+        selected_words = self.scheduler.due_words(test_count)
+        if len(selected_words) < test_count:
+            due = set(selected_words)
+            extra = [word for word in self.sampler.sample(test_count) if word not in due]
+            selected_words += extra[: test_count - len(selected_words)]
         return selected_words
 
+    def choose_affix_words(self, affix: str, test_count: int) -> list[str]:
+        """含有指定詞綴的單詞，淨答錯次數越多越優先，同分時隨機"""
+        words = [word for word in self.affixes.words_with(affix) if word in self.vocabulary] if self.affixes else []
+        random.shuffle(words)
+        words.sort(key=lambda word: self.log.get(word, 0))
+        return words[:test_count]
+
     def run_test(self, test_count: int) -> tuple[list[str], list[bool]]:
         """執行詞彙測試"""
         selected_words = self.choose_words(test_count)
@@ -122,48 +202,13 @@ class VocabularyTester:
             if user_answer.lower().strip() in SKIP_ANSWERS:
                 corrections.append(False)
                 continue
-            correct_answer = self.vocabulary[word]
-            if self._compare_answer(user_answer, correct_answer):
+            # 完全相符時自動算對 (auto_accept 時少量錯字也算對)，其餘交由用戶確認
+            if self.answers.matches(word, user_answer) or (self.auto_accept and self.answers.grade(word, user_answer)[0]):
                 corrections.append(True)
             else:
-                corrections.append(self._ask_user_confirmation(i, word, user_answer, correct_answer))
+                corrections.append(self._ask_user_confirmation(i, word, user_answer, self.vocabulary[word]))
         return corrections
 
-    def _split_answer(self, answer: str) -> list[str]:
-        """將答案按多種分隔符分割（、空格、逗號等）"""
-        parts = [answer]
-        for sep in ("、", ",", " ", ", "):
-            parts = [j.strip() for i in parts for j in i.split(sep) if j.strip()]
-        return parts
-
-    def _normalize_answer(self, answer: str) -> str:
-        """標準化答案：移除中文助詞並轉換為小寫"""
-        answer = answer.lower().strip()
-        if answer and answer[-1] in CHINESE_PARTICLES:
-            answer = answer[:-1].strip()
-        return answer
-
-    def _parse_correct_answer_variants(self, correct_answer: str) -> list[str]:
-        """解析正確答案的所有變體"""
-        variants: list[str] = []
-        for variant in self._split_answer(correct_answer):
-            variant = variant.lower().strip()
-            # 處理同義詞標記 (=...)
-            if len(variant) >= 4 and variant[0] == "(" and variant[1] == "=" and variant[-1] == ")":
-                variant = variant[2:-1].strip()
-            variants.append(self._normalize_answer(variant))
-        return variants
-
-    def _compare_answer(self, user_answer: str, correct_answer: str) -> bool:
-        """比較用戶答案與正確答案"""
-        correct_variants = self._parse_correct_answer_variants(correct_answer)
-        user_variants = [self._normalize_answer(ans) for ans in self._split_answer(user_answer)]
-
-        for user_var in user_variants:
-            if user_var in correct_variants:
-                return True
-        return False
-
     def _ask_user_confirmation(self, question_num: int, word: str, user_answer: str, correct_answer: str) -> bool:
         """當自動匹配失敗時，詢問用戶答案是否正確"""
         print(f"\n第 {question_num} 題：'{word}'")
@@ -184,10 +229,15 @@ class VocabularyTester:
         print("測試結果")
         print(f"{SEPARATOR}")
 
-        display = DisplayInfo(("題號", "單字", "結果", "答案", "google翻譯", "辭源"), "N/A")
+        # 只有下方實際印出辭源的單字 (答錯且有內容) 才標示「見下方」
+        etymologies = self._etymology_excerpts(words, corrections)
+        display = DisplayInfo(("題號", "單字", "結果", "答案", "google翻譯", "辭源"), "N/A", (None, None, None, ANSWER_WIDTH, None, None))
         for i, (word, is_correct) in enumerate(zip(words, corrections), 1):
             google_url = f"https://translate.google.com/?sl=en&tl=zh-TW&text={word.replace(' ', '%20')}"
-            etymology_url = f"https://www.etymonline.com/search?q={word.replace(' ', '%20')}"
+            if word in etymologies:
+                etymology_url = "見下方"
+            else:
+                etymology_url = f"https://www.etymonline.com/search?q={word.replace(' ', '%20')}"
             result_text = "✓ 正確" if is_correct else "✗ 錯誤"
             display.add((i, word, result_text, self.vocabulary[word], google_url, etymology_url))
         display.display()
@@ -196,12 +246,35 @@ class VocabularyTester:
         total_count = len(corrections)
         score = (correct_count / total_count) * 100
         print(f"\n總分：{correct_count}/{total_count} ({score:.1f}%)")
+        self._show_etymology(etymologies)
 
         for word, is_correct in zip(words, corrections):
             if is_correct:
                 self.log[word] = self.log.get(word, 0) + 1
             else:
                 self.log[word] = self.log.get(word, 0) - 1
+            self.sampler.set_accuracy(word, self.log[word])
+            self.scheduler.review(word, is_correct)
+
+    def _etymology_excerpts(self, words: list[str], corrections: list[bool]) -> dict[str, tuple[str, str]]:
+        """答錯且有辭源的單字 → (第一段標題, 第一段內文)"""
+        excerpts: dict[str, tuple[str, str]] = {}
+        if self.etymology is None:
+            return excerpts
+        for word, is_correct in zip(words, corrections):
+            if is_correct or word in excerpts:
+                continue
+            sections = self.etymology.sections(word)
+            if sections:
+                heading, body = sections[0]
+                excerpts[word] = (heading, body.split("\n\n")[0])
+        return excerpts
+
+    def _show_etymology(self, excerpts: dict[str, tuple[str, str]]) -> None:
+        """顯示答錯單字的第一段辭源"""
+        for word, (heading, body) in excerpts.items():
+            print(f"\n[{word}] {heading}")
+            print(body)
 
     def run(self) -> None:
         """主程序循環"""
@@ -209,18 +282,23 @@ class VocabularyTester:
         print(f"詞彙庫包含 {len(self.vocabulary)} 個單詞。")
 
         while True:
-            choice = input("\n[1. 開始測試][2. 查看歷史記錄][3. 讀取紀錄][4. 保存紀錄][5. 退出]: ")
+            choice = input("\n[1. 開始測試][2. 查看歷史記錄][3. 讀取紀錄][4. 保存紀錄][5. 退出][6. 詞綴測試]: ")
             if choice == "1":
                 self._handle_start_test()
             elif choice == "2":
                 self._handle_view_history()
             elif choice == "3":
-                self.log = self.load_log()
+                self.journal = ReviewJournal()
+                self._load_state()
             elif choice == "4":
                 self.save_log(self.log)
             elif choice == "5":
+                if self.journal.count:
+                    self.save_log(self.log)
                 print("\n謝謝使用，再見！")
                 return
+            elif choice == "6":
+                self._handle_affix_test()
             else:
                 print("\n無效選擇，請重新輸入。")
 
@@ -229,7 +307,56 @@ class VocabularyTester:
         test_count = self.get_test_count()
         words, corrections = self.run_test(test_count)
         self.show_results(words, corrections)
-        self.save_log(self.log)
+        self._record_results(words, corrections)
+
+    def _handle_affix_test(self) -> None:
+        """列出答錯比例最高的詞綴，選定詞綴後只測驗含有該詞綴的單詞"""
+        if not self.affixes_loaded:
+            self.affixes = self.load_affixes()
+            self.affixes_loaded = True
+        if self.affixes is None:
+            print(f"\n找不到詞綴文件 '{AFFIX_FILE}'。")
+            return
+        display = DisplayInfo(("詞綴", "單字數", "已測", "答錯", "意思"), "尚無含詞綴單字的測驗記錄")
+        weakest = self.affixes.weakest(self.log)
+        for affix, total, tested, failing in weakest:
+            display.add((affix, total, tested, failing, self.affixes.meanings.get(affix, "")))
+        display.display()
+        default = weakest[0][0] if weakest else ""
+        affix = input(f"請輸入詞綴 (如 -tion、ab-，直接按 Enter 選擇 {default or '無'}): ").strip() or default
+        if not self.affixes.words_with(affix):
+            print(f"沒有含有詞綴 '{affix}' 的單詞。")
+            return
+        words = self.choose_affix_words(affix, self.get_test_count())
+        user_answers = self._collect_user_answers(words, len(words))
+        corrections = self.check_answers(words, user_answers)
+        self.show_results(words, corrections)
+        self._record_results(words, corrections)
+
+    def _load_state(self) -> None:
+        """載入 log.json 與 review.json 快照，再重播日誌中尚未壓縮的事件"""
+        self.log = self.load_log()
+        if isinstance(self.vocabulary, VocabularyIndex):
+            # lazy：單字與位置直接查詢排序索引，不建立串列與 dict
+            self.sampler = WordSampler(self.vocabulary.words(), self.log, self.vocabulary.positions())
+        else:
+            self.sampler = WordSampler(list(self.vocabulary), self.log)
+        # 沒有 review.json 時由 log.json 的次數 (已包含日誌事件) 轉換，此時不再重播
+        self.scheduler = ReviewScheduler.load(self.vocabulary, self.log)
+        if self.journal.applies_to(self.scheduler.file_path):
+            for word, correct, timestamp in self.journal.events():
+                self.scheduler.review(word, correct, timestamp)
+
+    def _record_results(self, words: list[str], corrections: list[bool]) -> None:
+        """附加到日誌，只在日誌過長或尚未建立時重寫整份記錄"""
+        if not self.journal_current or self.journal.count >= COMPACT_EVERY:
+            self.save_log(self.log)
+            return
+        try:
+            self.journal.append(zip(words, corrections))
+            print("\n歷史記錄已保存。")
+        except Exception as e:
+            print(f"\n保存歷史記錄時發生錯誤：{e}")
 
     def _handle_view_history(self) -> None:
         """處理查看歷史記錄選項"""
@@ -259,33 +386,34 @@ class VocabularyTester:
             return
 
         print(title)
-        result.sort(key=lambda x: x[1], reverse=True)
-        maxlen = max(len(word) for word, _ in result)
-
-        for i, (word, times) in enumerate(result):
-            print(f"{word:<{maxlen}}: {times} 次")
-            if i % 10 == 9:
-                user_input = input("按 Enter 鍵繼續(輸入 q 或 exit 離開)...")
-                if user_input.lower() in ("q", "exit"):
-                    break
-                print("\033[F\033[K", end="")
+        display = DisplayInfo(("單字", "次數"), "無記錄", (HISTORY_WORD_WIDTH, None))
+        # 每列只量測一次 (同時決定欄寬)，再以堆積依次數由高到低逐列產生，只排序實際翻閱到的部分
+        heap = [(-times, display.measure((word, times))) for word, times in result]
+        heapq.heapify(heap)
+        lines = display.lines(heapq.heappop(heap)[1] for _ in range(len(heap)))
+        print(next(lines))
+        page_through(lines, PAGE_SIZE)
 
     def load_log(self) -> dict[str, int]:
-        """從文件載入歷史記錄"""
+        """從文件載入歷史記錄，並套用日誌中的答題結果"""
+        log: dict[str, int] = {}
         try:
             with open(LOG_FILE, "r", encoding="utf-8") as log_file:
                 log = load(log_file)
             print("\n歷史記錄已讀取。")
-            return log
         except FileNotFoundError:
             print("\n未找到歷史記錄文件，將創建新的記錄。")
-            return {}
         except Exception as e:
             print(f"\n讀取歷史記錄時發生錯誤：{e}")
-            return {}
+        # 日誌建立在其他版本的 log.json 上 (例如壓縮中斷) 時不可套用，下次保存時重新壓縮
+        self.journal_current = self.journal.applies_to(LOG_FILE)
+        if self.journal_current:
+            for word, correct, _ in self.journal.events():
+                log[word] = log.get(word, 0) + (1 if correct else -1)
+        return log
 
     def save_log(self, log: dict[str, int]) -> None:
-        """保存歷史記錄到文件"""
+        """將歷史記錄與複習排程完整寫入快照，並清空日誌"""
         # 過濾掉計數為 0 的項目
         filtered_log = {k: v for k, v in log.items() if v != 0}
         # 先按字母順序排序，再按計數降序排序
@@ -293,12 +421,18 @@ class VocabularyTester:
         sorted_log = dict(sorted(sorted_log.items(), key=lambda item: item[1], reverse=True))
 
         try:
-            with open(LOG_FILE, "w", encoding="utf-8") as log_file:
-                dump(sorted_log, log_file, indent=4, ensure_ascii=False)
+            write_snapshot(LOG_FILE, dumps(sorted_log, indent=4, ensure_ascii=False))
+            self.scheduler.save()
+            self.journal.reset((LOG_FILE, self.scheduler.file_path))
+            self.journal_current = True
             print("\n歷史記錄已保存。")
         except Exception as e:
             print(f"\n保存歷史記錄時發生錯誤：{e}")
 
 
 if __name__ == "__main__":
-    VocabularyTester().run()
+    parser = argparse.ArgumentParser(description="英語詞彙測試")
+    parser.add_argument("--auto-accept", action="store_true", help="只有少量錯字的答案直接算對，不再詢問")
+    parser.add_argument("--lazy", action="store_true", help="大型詞彙檔：只建立排序的位移索引，定義在需要時才讀取")
+    args = parser.parse_args()
+    VocabularyTester(lazy=args.lazy, auto_accept=args.auto_accept).run()
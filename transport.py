@@ -0,0 +1,123 @@
+import asyncio, hashlib
+import aiohttp
+from importlib.util import find_spec
+from multidict import CIMultiDict
+from os.path import join, exists
+from typing import Mapping
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+# (狀態碼, 內容, 回應標頭)，304 時內容為空字串；標頭不分大小寫
+Response = tuple[int, str, Mapping[str, str]]
+
+# aiohttp 只在安裝 brotli (或 brotlicffi) 時能解 br，否則不宣告以免收到無法解碼的回應
+HAS_BROTLI = find_spec("brotli") is not None or find_spec("brotlicffi") is not None
+ACCEPT_ENCODING = "gzip, deflate, br" if HAS_BROTLI else "gzip, deflate"
+NOT_FOUND_PAGE = "<html><head><title>Page Not Found</title></head><body></body></html>"
+
+
+class TransportError(Exception):
+    """連線失敗等可重試的傳輸錯誤"""
+
+
+class Transport:
+    """抓取後端介面：在 async with 期間可重複呼叫 get，所有請求共用同一組連線"""
+
+    async def __aenter__(self) -> "Transport":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        pass
+
+    async def get(self, url: str, headers: Mapping[str, str] | None = None, timeout: float | None = None) -> Response:
+        raise NotImplementedError
+
+
+class AiohttpTransport(Transport):
+    """以單一 aiohttp ClientSession 連網
+
+    每個主機的連線數上限應與排程器的併發上限一致，多出的連線只會閒置；
+    DNS 查詢結果快取 dns_cache_ttl 秒，閒置連線保留 keepalive_timeout 秒供後續請求重用。
+    aiohttp 不支援 HTTP/2，連線重用靠 HTTP/1.1 keep-alive。
+    """
+
+    def __init__(
+        self,
+        limit_per_host: int = 30,
+        limit: int = 100,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: float = 30,
+        compress: bool = True,
+        headers: Mapping[str, str] | None = None,
+    ) -> None:
+        self.limit_per_host = limit_per_host
+        self.limit = limit
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.headers = {"Accept-Encoding": ACCEPT_ENCODING if compress else "identity", **(headers or {})}
+        self.session: aiohttp.ClientSession | None = None
+
+    async def __aenter__(self) -> "AiohttpTransport":
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            use_dns_cache=True,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        self.session = aiohttp.ClientSession(connector=connector, headers=self.headers)
+        return self
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def get(self, url: str, headers: Mapping[str, str] | None = None, timeout: float | None = None) -> Response:
+        if self.session is None:
+            raise RuntimeError("AiohttpTransport 尚未開啟，請在 async with 中使用")
+        try:
+            async with self.session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                text = "" if response.status == 304 else await response.text()
+                return (response.status, text, response.headers.copy())
+        except aiohttp.ClientError as e:
+            raise TransportError(f"{type(e).__name__}: {e}") from e
+
+
+class FixtureTransport(Transport):
+    """以本機 HTML 檔代替網站，供測試與基準測試使用
+
+    .../word/<單字> 對應 <directory>/<單字>.html，/search?q=<字> 對應 <directory>/search/<字>.html，
+    找不到時回傳 404 與「Page Not Found」頁面；ETag 為檔案內容的雜湊，支援 If-None-Match。
+    latency 為每個請求模擬的網路延遲秒數。
+    """
+
+    def __init__(self, directory: str, latency: float = 0.0) -> None:
+        self.directory = directory
+        self.latency = latency
+        self.requests = 0
+
+    def fixture_path(self, url: str) -> str | None:
+        parts = urlsplit(url)
+        if "/word/" in parts.path:
+            return join(self.directory, unquote(parts.path.split("/word/")[-1]) + ".html")
+        if parts.path.endswith("/search"):
+            query = dict(parse_qsl(parts.query)).get("q", "")
+            return join(self.directory, "search", query + ".html")
+        return None
+
+    async def get(self, url: str, headers: Mapping[str, str] | None = None, timeout: float | None = None) -> Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        path = self.fixture_path(url)
+        if path is None or not exists(path):
+            return (404, NOT_FOUND_PAGE, CIMultiDict())
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        etag = '"' + hashlib.sha256(text.encode("utf-8")).hexdigest()[:16] + '"'
+        if headers and CIMultiDict(headers).get("If-None-Match") == etag:
+            return (304, "", CIMultiDict(ETag=etag))
+        return (200, text, CIMultiDict(ETag=etag))
@@ -0,0 +1,163 @@
+from array import array
+from collections.abc import Mapping, Sequence
+from os.path import exists
+from typing import Iterable, Iterator, overload
+
+
+def iter_entries(file_path: str) -> Iterator[tuple[str, str]]:
+    """逐行讀取 `單字: 定義` 格式的詞彙檔，不一次載入整個檔案"""
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if ": " in line:
+                word, definition = line.split(": ", 1)
+                yield (word, definition)
+
+
+def iter_defined_words(file_path: str) -> Iterator[str]:
+    """詞彙檔中每行冒號前的單字"""
+    if not exists(file_path):
+        return
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if ":" in line:
+                word = line.split(":", 1)[0].strip()
+                if word:
+                    yield word
+
+
+def iter_listed_words(file_path: str) -> Iterator[str]:
+    """每行一個單字的清單 (如 new.txt)，略過含 * 的行"""
+    if not exists(file_path):
+        return
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            word = line.strip()
+            if word and "*" not in word:
+                yield word
+
+
+def unique(*sources: Iterable[str]) -> list[str]:
+    """依首次出現的順序去除重複，以 dict 作為有序集合"""
+    seen: dict[str, None] = {}
+    for source in sources:
+        seen.update(dict.fromkeys(source))
+    return list(seen)
+
+
+class VocabularyIndex(Mapping[str, str]):
+    """詞彙檔的排序鍵與位移索引，查詢單一定義時才讀取該行
+
+    鍵以 UTF-8 連續存放，另以兩個 array 記錄鍵的位置與行在檔案中的位移；
+    同一單字出現多次時與 dict 相同，以最後一次為準。
+    """
+
+    def __init__(self, file_path: str) -> None:
+        self.file_path = file_path
+        self.file = open(file_path, "rb")
+        entries: list[tuple[bytes, int]] = []
+        offset = 0
+        for line in self.file:
+            key, sep, _ = line.strip().partition(b": ")
+            if sep:
+                entries.append((key, offset))
+            offset += len(line)
+        # 相同鍵依位移排序，最後一筆即為檔案中最後出現的一行
+        entries.sort()
+        self._key_blob = bytearray()
+        self.key_offsets = array("Q", [0])
+        self.line_offsets = array("Q")
+        for i, (key, offset) in enumerate(entries):
+            if i + 1 < len(entries) and entries[i + 1][0] == key:
+                continue
+            self._key_blob += key
+            self.key_offsets.append(len(self._key_blob))
+            self.line_offsets.append(offset)
+
+    def __len__(self) -> int:
+        return len(self.line_offsets)
+
+    def key(self, i: int) -> bytes:
+        return bytes(self._key_blob[self.key_offsets[i] : self.key_offsets[i + 1]])
+
+    def find(self, word: str) -> int:
+        target = word.encode("utf-8")
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < len(self) and self.key(lo) == target else -1
+
+    def __contains__(self, word: object) -> bool:
+        return isinstance(word, str) and self.find(word) >= 0
+
+    def __getitem__(self, word: str) -> str:
+        i = self.find(word)
+        if i < 0:
+            raise KeyError(word)
+        self.file.seek(self.line_offsets[i])
+        return self.file.readline().decode("utf-8").strip().split(": ", 1)[1]
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self.key(i).decode("utf-8")
+
+    def words(self) -> "IndexWords":
+        return IndexWords(self)
+
+    def positions(self) -> "IndexPositions":
+        return IndexPositions(self)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class IndexWords(Sequence[str]):
+    """依排序位置取用單字的唯讀序列，取用時才解碼，不建立整份單字串列"""
+
+    def __init__(self, vocabulary: VocabularyIndex) -> None:
+        self.vocabulary = vocabulary
+
+    def __len__(self) -> int:
+        return len(self.vocabulary)
+
+    @overload
+    def __getitem__(self, i: int) -> str: ...
+
+    @overload
+    def __getitem__(self, i: slice) -> list[str]: ...
+
+    def __getitem__(self, i: int | slice) -> str | list[str]:
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.vocabulary.key(i).decode("utf-8")
+
+
+class IndexPositions(Mapping[str, int]):
+    """單字 → 排序位置的唯讀對應，以二分搜尋查詢，不建立 dict"""
+
+    def __init__(self, vocabulary: VocabularyIndex) -> None:
+        self.vocabulary = vocabulary
+
+    def __len__(self) -> int:
+        return len(self.vocabulary)
+
+    def __getitem__(self, word: str) -> int:
+        i = self.vocabulary.find(word)
+        if i < 0:
+            raise KeyError(word)
+        return i
+
+    def __contains__(self, word: object) -> bool:
+        return word in self.vocabulary
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.vocabulary)
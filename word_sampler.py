@@ -0,0 +1,99 @@
+import random
+from typing import Mapping, Sequence
+
+
+class WordSampler:
+    """依準確率加權、不重複抽取單字的 Fenwick tree
+
+    權重為 (最高準確率 - 該單字準確率 + 1)。樹中只存 -準確率，共同的 (最高準確率 + 1)
+    在下降搜尋時依節點涵蓋的長度加上，因此最高準確率改變時不需更新整棵樹。
+    抽取 k 個單字與更新一個單字的準確率皆為 O(log n)。
+    """
+
+    def __init__(self, words: Sequence[str], accuracy: dict[str, int], position: Mapping[str, int] | None = None) -> None:
+        # 傳入 position 時 words 與 position 由多個 sampler 共用 (唯讀)，不另外複製；每個 sampler 只有自己的權重樹
+        # (也可以是 VocabularyIndex 的序列與位置檢視，不必建立串列與 dict)
+        if position is None:
+            words = list(words)
+            position = {word: i for i, word in enumerate(words)}
+        self.words = words
+        self.position = position
+        self.size = len(self.words)
+        self.accuracy: dict[str, int] = {}
+        # 各準確率值出現的次數，用來維護最高準確率 (包含不在詞彙中的紀錄)
+        self.value_counts: dict[int, int] = {}
+        self.offset_sum = 0
+        self.tree = [0] * (self.size + 1)
+        for word, value in accuracy.items():
+            self.accuracy[word] = value
+            self.value_counts[value] = self.value_counts.get(value, 0) + 1
+            if word in self.position:
+                self.tree[self.position[word] + 1] -= value
+                self.offset_sum -= value
+        self.max_accuracy = max(self.value_counts, default=0)
+        # O(n) 建樹
+        for i in range(1, self.size + 1):
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self.tree[parent] += self.tree[i]
+
+    def _add(self, index: int, delta: int) -> None:
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+        self.offset_sum += delta
+
+    def _find(self, target: int, base: int) -> int:
+        """回傳前綴權重和第一個大於 target 的位置"""
+        pos = 0
+        step = 1 << (self.size.bit_length() - 1) if self.size else 0
+        while step:
+            nxt = pos + step
+            if nxt <= self.size:
+                weight = base * step + self.tree[nxt]
+                if weight <= target:
+                    pos = nxt
+                    target -= weight
+            step >>= 1
+        return pos
+
+    def set_accuracy(self, word: str, value: int) -> None:
+        """show_results 更新 log 後呼叫，就地調整權重"""
+        old = self.accuracy.get(word, 0)
+        if word in self.accuracy:
+            self.value_counts[old] -= 1
+            if not self.value_counts[old]:
+                del self.value_counts[old]
+        self.accuracy[word] = value
+        self.value_counts[value] = self.value_counts.get(value, 0) + 1
+        if value > self.max_accuracy:
+            self.max_accuracy = value
+        elif old == self.max_accuracy and old not in self.value_counts:
+            self.max_accuracy = max(self.value_counts, default=0)
+        if word in self.position:
+            self._add(self.position[word], old - value)
+
+    def weight_base(self) -> int:
+        # 紀錄全為負數時以 0 為最高準確率，確保沒有紀錄的單字權重仍為正
+        return max(self.max_accuracy, 0) + 1
+
+    def weight(self, word: str) -> int:
+        return self.weight_base() - self.accuracy.get(word, 0)
+
+    def sample(self, k: int, rng: random.Random | None = None) -> list[str]:
+        """不重複抽取 k 個單字；抽中的單字暫時設為權重 0，抽完後還原"""
+        randrange = rng.randrange if rng is not None else random.randrange
+        k = min(k, self.size)
+        base = self.weight_base()
+        selected: list[tuple[int, int]] = []
+        total = base * self.size + self.offset_sum
+        for _ in range(k):
+            index = self._find(randrange(total), base)
+            weight = base - self.accuracy.get(self.words[index], 0)
+            self._add(index, -weight)
+            total -= weight
+            selected.append((index, weight))
+        for index, weight in selected:
+            self._add(index, weight)
+        return [self.words[index] for index, _ in selected]